@@ -1,13 +1,31 @@
-from flask import Flask, jsonify, render_template_string, request
-from google.cloud import bigquery, pubsub_v1, storage
+from flask import Flask, Response, g, has_request_context, jsonify, render_template_string, request, stream_with_context
+from google.cloud import bigquery, bigquery_storage, pubsub_v1, storage
 from google.cloud.container_v1 import ClusterManagerClient
 from google.cloud.orchestration.airflow import service_v1
 from google.api_core import exceptions
 from google.oauth2 import service_account
 from kubernetes import client, config
-from datetime import datetime
+from kubernetes.utils import parse_quantity
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import wraps
+from datetime import datetime, timedelta
+from typing import Optional
+import csv
+import google.auth
+import google.auth.transport.requests
+import io
+import json
+import numpy as np
 import os
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import re
 import requests
+import threading
+import time
 import urllib3
 import logging
 
@@ -25,6 +43,394 @@ PROJECT_ID = os.getenv('GOOGLE_CLOUD_PROJECT', 'tflabs')
 GKE_CLUSTER = os.getenv('GKE_CLUSTER', 'cluster-1')
 GKE_ZONE = os.getenv('GKE_ZONE', 'us-central1-c')
 GKE_NAMESPACE = os.getenv('GKE_NAMESPACE', 'kube-system')
+BQ_REGIONS = [r.strip() for r in os.getenv('BQ_REGIONS', 'us').split(',') if r.strip()]
+STORAGE_CACHE_TTL = int(os.getenv('STORAGE_CACHE_TTL', '300'))
+STORAGE_MAX_TOP = int(os.getenv('STORAGE_MAX_TOP', '100'))
+PREVIEW_DEFAULT_ROWS = int(os.getenv('PREVIEW_DEFAULT_ROWS', '100'))
+PREVIEW_MAX_ROWS = int(os.getenv('PREVIEW_MAX_ROWS', '1000'))
+PREVIEW_MAX_BYTES = int(os.getenv('PREVIEW_MAX_BYTES', str(8 * 1024**2)))
+METRICS_TIMEOUT = int(os.getenv('METRICS_TIMEOUT', '5'))
+LOG_TAIL_LINES = int(os.getenv('LOG_TAIL_LINES', '200'))
+LOG_CHUNK_BYTES = int(os.getenv('LOG_CHUNK_BYTES', '8192'))
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(4 * 1024**2)))
+LOG_MAX_SECONDS = int(os.getenv('LOG_MAX_SECONDS', '300'))
+LOG_BUFFER_LINES = int(os.getenv('LOG_BUFFER_LINES', '2000'))
+LOG_MAX_PODS = int(os.getenv('LOG_MAX_PODS', '10'))
+LOG_CONNECT_TIMEOUT = int(os.getenv('LOG_CONNECT_TIMEOUT', '10'))
+LOG_IDLE_SECONDS = int(os.getenv('LOG_IDLE_SECONDS', '10'))
+AIRFLOW_MAX_CONCURRENCY = int(os.getenv('AIRFLOW_MAX_CONCURRENCY', '8'))
+AIRFLOW_BATCH_SIZE = int(os.getenv('AIRFLOW_BATCH_SIZE', '50'))
+AIRFLOW_PAGE_SIZE = int(os.getenv('AIRFLOW_PAGE_SIZE', '100'))
+AIRFLOW_MAX_RUN_PAGES = int(os.getenv('AIRFLOW_MAX_RUN_PAGES', '10'))
+AIRFLOW_LOOKBACK_HOURS = int(os.getenv('AIRFLOW_LOOKBACK_HOURS', '24'))
+AIRFLOW_CACHE_TTL = int(os.getenv('AIRFLOW_CACHE_TTL', '60'))
+AIRFLOW_TIMEOUT = int(os.getenv('AIRFLOW_TIMEOUT', '30'))
+TAG_WATCH_SIZE = int(os.getenv('TAG_WATCH_SIZE', '4096'))
+TAG_WATCH_TTL = int(os.getenv('TAG_WATCH_TTL', '3600'))
+PUBSUB_CACHE_TTL = int(os.getenv('PUBSUB_CACHE_TTL', '60'))
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '30'))
+RESPONSE_CACHE_SWR = int(os.getenv('RESPONSE_CACHE_SWR', '300'))
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '512'))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(64 * 1024**2)))
+RESPONSE_CACHE_MAX_BODY = int(os.getenv('RESPONSE_CACHE_MAX_BODY', str(1024**2)))
+SURROGATE_KEY_HEADER = os.getenv('SURROGATE_KEY_HEADER', 'Surrogate-Key')
+CDN_PURGE_URL = os.getenv('CDN_PURGE_URL', '')
+CDN_PURGE_TOKEN = os.getenv('CDN_PURGE_TOKEN', '')
+CDN_PURGE_TIMEOUT = int(os.getenv('CDN_PURGE_TIMEOUT', '10'))
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '8'))
+EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', '500'))
+EXPORT_ROW_GROUP = int(os.getenv('EXPORT_ROW_GROUP', '10000'))
+EXPORT_CHUNK_BYTES = int(os.getenv('EXPORT_CHUNK_BYTES', str(64 * 1024)))
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, ttl, maxsize=256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._loading = {}  # key -> Future of the load in progress
+        self._lock = threading.Lock()
+
+    def _get(self, key, default):
+        # Caller holds self._lock
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._get(key, default)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        """Return the cached value, or run `loader` once for all concurrent callers missing `key`"""
+        missing = object()
+        with self._lock:
+            value = self._get(key, missing)
+            if value is not missing:
+                return value
+            future = self._loading.get(key)
+            loading = future is None
+            if loading:
+                future = self._loading[key] = Future()
+        if not loading:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+
+storage_summary_cache = TTLCache(STORAGE_CACHE_TTL, maxsize=16)  # (project, regions) -> (table, aggregates)
+airflow_cache = TTLCache(AIRFLOW_CACHE_TTL, maxsize=20000)
+pubsub_cache = TTLCache(PUBSUB_CACHE_TTL, maxsize=16)
+# Purge trigger for the GKE pages, not a display source: (namespace, image tag) ->
+# (creation time, digest) of the newest pod seen running that tag, so purge_on_tag_move
+# can tell when a tag starts pointing at a new image
+tag_watch = TTLCache(TAG_WATCH_TTL, maxsize=TAG_WATCH_SIZE)
+
+
+class ResponseCache(TTLCache):
+    """Rendered responses keyed by path and the query args a route reads, purgeable by surrogate key
+
+    Bounded by total body bytes as well as entry count.
+    """
+
+    def __init__(self, ttl, maxsize=256, maxbytes=None):
+        super().__init__(ttl, maxsize)
+        self.maxbytes = maxbytes
+
+    def set(self, key, value, ttl=None):
+        super().set(key, value, ttl)
+        if self.maxbytes is None:
+            return
+        with self._lock:
+            size = sum(len(entry['body']) for _, entry in self._data.values())
+            while size > self.maxbytes and self._data:
+                _, (_, entry) = self._data.popitem(last=False)
+                size -= len(entry['body'])
+
+    def purge(self, *surrogate_keys, keep=None):
+        """Drop every cached response tagged with any of `surrogate_keys`, except `keep`"""
+        wanted = set(surrogate_keys)
+        with self._lock:
+            stale = [key for key, (_, entry) in self._data.items() if wanted & entry['keys'] and key != keep]
+            for key in stale:
+                del self._data[key]
+        if stale:
+            logger.debug(f"Purged {len(stale)} cached responses for {sorted(wanted)}")
+        return len(stale)
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_TTL, maxsize=RESPONSE_CACHE_SIZE, maxbytes=RESPONSE_CACHE_MAX_BYTES)
+cdn_purge_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cdn-purge')
+
+def purge_cdn(surrogate_keys):
+    """POST `surrogate_keys` to CDN_PURGE_URL; failures are logged, the CDN TTL still applies"""
+    headers = {SURROGATE_KEY_HEADER: ' '.join(surrogate_keys)}
+    if CDN_PURGE_TOKEN:
+        headers['Authorization'] = f"Bearer {CDN_PURGE_TOKEN}"
+    try:
+        response = requests.post(CDN_PURGE_URL, headers=headers, json={'surrogate_keys': surrogate_keys},
+                                 timeout=CDN_PURGE_TIMEOUT)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logger.warning(f"CDN purge of {surrogate_keys} failed: {e}")
+
+def purge_surrogate_keys(*surrogate_keys, keep=None):
+    """Purge this worker's cached responses and, when CDN_PURGE_URL is set, the CDN's copies
+
+    `response_cache` lives in each worker process, so other workers only drop
+    their copies when their own refresh hooks fire or the TTL runs out.
+    """
+    response_cache.purge(*surrogate_keys, keep=keep)
+    if CDN_PURGE_URL:
+        cdn_purge_executor.submit(purge_cdn, sorted(surrogate_keys))
+
+def purge_after_request(*surrogate_keys):
+    """Purge `surrogate_keys` once the current request is done, or now outside a request
+
+    The page rendered by the current request already reflects the new data,
+    so it is kept.
+    """
+    if has_request_context():
+        g.setdefault('pending_purges', set()).update(surrogate_keys)
+    else:
+        purge_surrogate_keys(*surrogate_keys)
+
+@app.teardown_request
+def run_pending_purges(exc):
+    surrogate_keys = g.pop('pending_purges', None)
+    if surrogate_keys:
+        purge_surrogate_keys(*surrogate_keys, keep=g.get('response_cache_key'))
+
+def purging(loader, *surrogate_keys):
+    """Wrap a data loader so fresh data purges the pages rendered from the old data"""
+    def load():
+        value = loader()
+        purge_after_request(*surrogate_keys)
+        return value
+    return load
+
+def cached_response(*surrogate_keys, args=()):
+    """Serve a route from `response_cache` and tag it for CDN purging
+
+    `args` names the query arguments the route reads; only those go into the
+    cache key, so unrelated arguments do not store another copy. Surrogate
+    keys are format strings over the view arguments plus the `namespace`
+    query argument; only list keys that a refresh hook purges. Routes without
+    keys are cached for RESPONSE_CACHE_TTL only. Streamed and non-200
+    responses, and bodies over RESPONSE_CACHE_MAX_BODY, are not stored.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**view_args):
+            if RESPONSE_CACHE_TTL <= 0:
+                return view(**view_args)
+            cache_key = (request.path, tuple(request.args.get(name) for name in args))
+            g.response_cache_key = cache_key
+            entry = response_cache.get(cache_key)
+            if entry is None:
+                response = app.make_response(view(**view_args))
+                if response.status_code != 200 or response.is_streamed:
+                    response.headers['Cache-Control'] = 'no-store'
+                    return response
+                params = dict(view_args, namespace=request.args.get('namespace', GKE_NAMESPACE))
+                response.add_etag()
+                entry = {
+                    'body': response.get_data(),
+                    'status': response.status_code,
+                    'headers': list(response.headers.items()),
+                    'keys': {key.format_map(params) for key in surrogate_keys},
+                    'stored': time.monotonic(),
+                }
+                if len(entry['body']) <= RESPONSE_CACHE_MAX_BODY:
+                    response_cache.set(cache_key, entry)
+                cache_status = 'MISS'
+            else:
+                cache_status = 'HIT'
+
+            response = Response(entry['body'], status=entry['status'], headers=entry['headers'])
+            response.headers['Cache-Control'] = \
+                f"public, max-age={RESPONSE_CACHE_TTL}, stale-while-revalidate={RESPONSE_CACHE_SWR}"
+            response.headers['Age'] = str(int(time.monotonic() - entry['stored']))
+            if entry['keys']:
+                response.headers[SURROGATE_KEY_HEADER] = ' '.join(sorted(entry['keys']))
+            response.headers['X-Cache'] = cache_status
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+# Inventory records. These keep raw values only; formatting happens in the
+# templates so cached inventories stay small.
+
+@dataclass(slots=True)
+class DatasetRecord:
+    dataset_id: str
+    project: str
+
+    @property
+    def full_dataset_id(self):
+        return f"{self.project}.{self.dataset_id}"
+
+
+@dataclass(slots=True)
+class TableRecord:
+    table_id: str
+    type: str
+    created: datetime
+    num_rows: int
+    num_bytes: int
+
+
+@dataclass(slots=True)
+class SchemaFieldRecord:
+    name: str
+    field_type: str
+    mode: str
+    description: str
+
+    @classmethod
+    def from_field(cls, field):
+        return cls(field.name, field.field_type, field.mode, field.description or '')
+
+
+@dataclass(slots=True)
+class SubscriptionRecord:
+    name: str
+    topic: str
+    push_endpoint: str
+    retention_seconds: int
+    message_ordering: bool
+    exactly_once: bool
+    expiration_seconds: Optional[int]  # None means the subscription never expires
+    dead_letter_topic: str = ''
+    max_delivery_attempts: int = 0
+    bigquery_table: str = ''
+
+    @classmethod
+    def from_proto(cls, sub):
+        ttl = int(sub.expiration_policy.ttl.total_seconds()) if 'expiration_policy' in sub else 0
+        return cls(
+            sub.name,
+            sub.topic,
+            sub.push_config.push_endpoint,
+            int(sub.message_retention_duration.total_seconds()) or 604800,
+            sub.enable_message_ordering,
+            sub.enable_exactly_once_delivery,
+            ttl or None,
+            sub.dead_letter_policy.dead_letter_topic,
+            sub.dead_letter_policy.max_delivery_attempts,
+            sub.bigquery_config.table,
+        )
+
+    @property
+    def delivery(self):
+        if self.bigquery_table:
+            return 'BigQuery'
+        return 'Push' if self.push_endpoint else 'Pull'
+
+
+@dataclass(slots=True)
+class TopicNode:
+    name: str
+    subscriptions: list
+    dead_letter_sources: list  # subscriptions that dead-letter into this topic
+
+    @property
+    def fan_out(self):
+        return len(self.subscriptions)
+
+    def count(self, delivery):
+        return sum(1 for sub in self.subscriptions if sub.delivery == delivery)
+
+
+@dataclass(slots=True)
+class PodRecord:
+    name: str
+    status: str
+    ready_count: int
+    container_count: int
+    restarts: int
+    age: datetime
+    cpu_usage: Optional[float] = None
+    memory_usage: Optional[float] = None
+
+
+@dataclass(slots=True)
+class ContainerRelease:
+    name: str
+    image: str
+    digests: dict  # running digest -> names of the pods running it
+
+    @property
+    def drift(self):
+        return len([digest for digest in self.digests if digest]) > 1
+
+
+@dataclass(slots=True)
+class ReplicaSetRevision:
+    revision: int
+    name: str
+    images: list  # (container name, image tag, digests its live pods run)
+    replicas: int
+    ready_replicas: int
+    created: datetime
+    change_cause: str
+
+
+@dataclass(slots=True)
+class DagRunStatus:
+    dag_id: str
+    is_paused: bool
+    # State of the latest run in the lookback window; None when there is no run, and
+    # 'unknown' when the run page cap was reached before this DAG's latest run was seen
+    state: Optional[str] = None
+    run_id: Optional[str] = None
+    execution_date: Optional[str] = None
+    end_date: Optional[str] = None
+    failed_tasks: tuple = ()
+
+
+@app.template_filter('thousands')
+def format_thousands(value):
+    return f"{value or 0:,}"
+
+
+@app.template_filter('gb')
+def format_gb(num_bytes):
+    return f"{(num_bytes or 0) / 1024**3:.2f}"
 
 
 # Shared Navigation Template
@@ -37,6 +443,9 @@ NAV_TEMPLATE = '''
                 <li class="nav-item">
                     <a class="nav-link" href="/gcpstatus/">BigQuery</a>
                 </li>
+                <li class="nav-item">
+                    <a class="nav-link" href="/gcpstatus/storage">BigQuery Storage</a>
+                </li>
                 <li class="nav-item">
                     <a class="nav-link" href="/gcpstatus/topics">Pub/Sub Topics</a>
                 </li>
@@ -137,9 +546,9 @@ TABLES_TEMPLATE = '''
                             <tr>
                                 <td><a href="/gcpstatus/schema/{{ project }}/{{ dataset_id }}/{{ table.table_id }}" class="text-decoration-none">{{ table.table_id }}</a></td>
                                 <td><span class="badge bg-secondary">{{ table.type }}</span></td>
-                                <td>{{ table.created }}</td>
-                                <td class="text-end">{{ table.num_rows }}</td>
-                                <td class="text-end">{{ table.size_gb }}</td>
+                                <td>{{ table.created.strftime('%Y-%m-%d %H:%M:%S') }}</td>
+                                <td class="text-end">{{ table.num_rows | thousands }}</td>
+                                <td class="text-end">{{ table.num_bytes | gb }}</td>
                             </tr>
                             {% endfor %}
                         </tbody>
@@ -172,8 +581,9 @@ SCHEMA_TEMPLATE = '''
             </ol>
         </nav>
         <div class="card">
-            <div class="card-header">
+            <div class="card-header d-flex justify-content-between align-items-center">
                 <h4 class="mb-0">Schema for {{ project }}.{{ dataset_id }}.{{ table_id }}</h4>
+                <a href="/gcpstatus/preview/{{ project }}/{{ dataset_id }}/{{ table_id }}" class="btn btn-sm btn-outline-primary">Preview Rows</a>
             </div>
             <div class="card-body">
                 <div class="table-responsive">
@@ -192,7 +602,7 @@ SCHEMA_TEMPLATE = '''
                                 <td><code>{{ field.name }}</code></td>
                                 <td><span class="badge bg-secondary">{{ field.field_type }}</span></td>
                                 <td><span class="badge bg-info">{{ field.mode }}</span></td>
-                                <td>{{ field.description or '' }}</td>
+                                <td>{{ field.description }}</td>
                             </tr>
                             {% endfor %}
                         </tbody>
@@ -206,6 +616,176 @@ SCHEMA_TEMPLATE = '''
 </html>
 '''
 
+# Table preview template, streamed as rows arrive from the Storage Read API
+PREVIEW_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Preview: {{ table_id }}</title>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
+</head>
+<body>
+    ''' + NAV_TEMPLATE + '''
+    <div class="container mt-4">
+        <nav aria-label="breadcrumb">
+            <ol class="breadcrumb">
+                <li class="breadcrumb-item"><a href="/gcpstatus/" class="text-decoration-none">Datasets</a></li>
+                <li class="breadcrumb-item"><a href="/gcpstatus/tables/{{ project }}/{{ dataset_id }}" class="text-decoration-none">{{ dataset_id }}</a></li>
+                <li class="breadcrumb-item"><a href="/gcpstatus/schema/{{ project }}/{{ dataset_id }}/{{ table_id }}" class="text-decoration-none">{{ table_id }}</a></li>
+                <li class="breadcrumb-item active">Preview</li>
+            </ol>
+        </nav>
+        <div class="card">
+            <div class="card-header">
+                <h4 class="mb-0">First {{ limit }} rows of {{ project }}.{{ dataset_id }}.{{ table_id }}</h4>
+                {% if row_restriction %}<small class="text-muted">where <code>{{ row_restriction }}</code></small>{% endif %}
+            </div>
+            <div class="card-body">
+                <div class="table-responsive">
+                    <table class="table table-sm table-striped table-hover">
+                        <thead class="table-dark">
+                            <tr>
+                                {% for column in columns %}
+                                <th>{{ column }}</th>
+                                {% endfor %}
+                            </tr>
+                        </thead>
+                        <tbody>
+                            {% for row in rows %}
+                            <tr>
+                                {% for column in columns %}
+                                <td>{{ row[column] }}</td>
+                                {% endfor %}
+                            </tr>
+                            {% endfor %}
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+        </div>
+    </div>
+</body>
+</html>
+'''
+
+# Project-wide storage summary template
+STORAGE_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>BigQuery Storage: {{ project }}</title>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
+</head>
+<body>
+    ''' + NAV_TEMPLATE + '''
+    <div class="container mt-4">
+        <div class="card mb-4">
+            <div class="card-header">
+                <h4 class="mb-0">BigQuery Storage for {{ project }} <small class="text-muted">({{ regions | join(', ') }})</small></h4>
+            </div>
+            <div class="card-body">
+                <div class="row text-center">
+                    <div class="col"><h5>{{ summary.table_count|thousands }}</h5>Tables</div>
+                    <div class="col"><h5>{{ summary.total_rows|thousands }}</h5>Rows</div>
+                    <div class="col"><h5>{{ summary.total_logical_bytes|gb }}</h5>Total GB</div>
+                    <div class="col"><h5>{{ summary.active_logical_bytes|gb }}</h5>Active GB</div>
+                    <div class="col"><h5>{{ summary.long_term_logical_bytes|gb }}</h5>Long-term GB</div>
+                </div>
+            </div>
+        </div>
+        <div class="card mb-4">
+            <div class="card-header">
+                <h4 class="mb-0">Largest Tables</h4>
+            </div>
+            <div class="card-body">
+                <div class="table-responsive">
+                    <table class="table table-striped table-hover">
+                        <thead class="table-dark">
+                            <tr>
+                                <th>Table</th>
+                                <th>Region</th>
+                                <th>Rows</th>
+                                <th>Size (GB)</th>
+                                <th>Long-term (GB)</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+                            {% for table in summary.largest %}
+                            <tr>
+                                <td><a href="/gcpstatus/schema/{{ project }}/{{ table.table_schema }}/{{ table.table_name }}" class="text-decoration-none">{{ table.table_schema }}.{{ table.table_name }}</a></td>
+                                <td>{{ table.region }}</td>
+                                <td class="text-end">{{ table.total_rows|thousands }}</td>
+                                <td class="text-end">{{ table.total_logical_bytes|gb }}</td>
+                                <td class="text-end">{{ table.long_term_logical_bytes|gb }}</td>
+                            </tr>
+                            {% endfor %}
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+        </div>
+        <div class="card mb-4">
+            <div class="card-header">
+                <h4 class="mb-0">Size per Dataset</h4>
+            </div>
+            <div class="card-body">
+                <div class="table-responsive">
+                    <table class="table table-striped table-hover">
+                        <thead class="table-dark">
+                            <tr>
+                                <th>Dataset</th>
+                                <th>Tables</th>
+                                <th>Rows</th>
+                                <th>Active (GB)</th>
+                                <th>Long-term (GB)</th>
+                                <th>Total (GB)</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+                            {% for dataset in summary.datasets %}
+                            <tr>
+                                <td><a href="/gcpstatus/tables/{{ project }}/{{ dataset.table_schema }}" class="text-decoration-none">{{ dataset.table_schema }}</a></td>
+                                <td class="text-end">{{ dataset.table_count|thousands }}</td>
+                                <td class="text-end">{{ dataset.total_rows|thousands }}</td>
+                                <td class="text-end">{{ dataset.active_logical_bytes|gb }}</td>
+                                <td class="text-end">{{ dataset.long_term_logical_bytes|gb }}</td>
+                                <td class="text-end">{{ dataset.total_logical_bytes|gb }}</td>
+                            </tr>
+                            {% endfor %}
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+        </div>
+        <div class="card">
+            <div class="card-header">
+                <h4 class="mb-0">Row Count Distribution</h4>
+            </div>
+            <div class="card-body">
+                <table class="table table-sm">
+                    <thead class="table-dark">
+                        <tr>
+                            <th>Rows per Table</th>
+                            <th>Tables</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {% for label, count in summary.row_distribution %}
+                        <tr>
+                            <td>{{ label }}</td>
+                            <td class="text-end">{{ count|thousands }}</td>
+                        </tr>
+                        {% endfor %}
+                    </tbody>
+                </table>
+            </div>
+        </div>
+    </div>
+    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
+</body>
+</html>
+'''
+
 # Topics Template
 TOPICS_TEMPLATE = '''
 <!DOCTYPE html>
@@ -228,6 +808,10 @@ TOPICS_TEMPLATE = '''
                             <tr>
                                 <th>Topic Name</th>
                                 <th>Full Path</th>
+                                <th>Subscriptions</th>
+                                <th>Pull / Push / BigQuery</th>
+                                <th>Dead-letter Sources</th>
+                                <th>Actions</th>
                             </tr>
                         </thead>
                         <tbody>
@@ -235,11 +819,23 @@ TOPICS_TEMPLATE = '''
                             <tr>
                                 <td>{{ topic.name.split('/')[-1] }}</td>
                                 <td><code>{{ topic.name }}</code></td>
+                                <td><span class="badge bg-{{ 'primary' if topic.fan_out else 'secondary' }}">{{ topic.fan_out }}</span></td>
+                                <td>{{ topic.count('Pull') }} / {{ topic.count('Push') }} / {{ topic.count('BigQuery') }}</td>
+                                <td>{% if topic.dead_letter_sources %}<span class="badge bg-warning text-dark">{{ topic.dead_letter_sources|length }}</span>{% endif %}</td>
+                                <td><a href="/gcpstatus/topics/{{ topic.name.split('/')[-1] }}" class="btn btn-primary btn-sm">Details</a></td>
                             </tr>
                             {% endfor %}
                         </tbody>
                     </table>
                 </div>
+                {% if orphans %}
+                <h5 class="mt-4">Subscriptions without a topic</h5>
+                <ul>
+                    {% for sub in orphans %}
+                    <li><code>{{ sub.name.split('/')[-1] }}</code> &rarr; <code>{{ sub.topic }}</code></li>
+                    {% endfor %}
+                </ul>
+                {% endif %}
             </div>
         </div>
     </div>
@@ -248,6 +844,94 @@ TOPICS_TEMPLATE = '''
 </html>
 '''
 
+# Topic Details Template
+TOPIC_DETAILS_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Topic {{ topic.name.split('/')[-1] }}</title>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
+</head>
+<body>
+    ''' + NAV_TEMPLATE + '''
+    <div class="container mt-4">
+        <div class="card mb-4">
+            <div class="card-header d-flex justify-content-between align-items-center">
+                <h4 class="mb-0">Topic: {{ topic.name.split('/')[-1] }}</h4>
+                <a href="/gcpstatus/topics" class="btn btn-secondary btn-sm">Back to Topics</a>
+            </div>
+            <div class="card-body">
+                <p class="mb-1"><code>{{ topic.name }}</code></p>
+                <p class="mb-0">
+                    Fan-out: <strong>{{ topic.fan_out }}</strong> subscription(s) &mdash;
+                    {{ topic.count('Pull') }} pull, {{ topic.count('Push') }} push, {{ topic.count('BigQuery') }} BigQuery
+                </p>
+            </div>
+        </div>
+        <div class="card mb-4">
+            <div class="card-header">
+                <h5 class="mb-0">Subscriptions</h5>
+            </div>
+            <div class="card-body">
+                <div class="table-responsive">
+                    <table class="table table-striped table-hover">
+                        <thead class="table-dark">
+                            <tr>
+                                <th>Subscription Name</th>
+                                <th>Delivery</th>
+                                <th>Endpoint</th>
+                                <th>Dead-letter Topic</th>
+                                <th>Max Attempts</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+                            {% for sub in topic.subscriptions %}
+                            <tr>
+                                <td>{{ sub.name.split('/')[-1] }}</td>
+                                <td><span class="badge bg-{{ {'Push': 'info', 'BigQuery': 'success'}.get(sub.delivery, 'secondary') }}">{{ sub.delivery }}</span></td>
+                                <td>
+                                    {% if sub.bigquery_table %}<code>{{ sub.bigquery_table }}</code>
+                                    {% elif sub.push_endpoint %}<code>{{ sub.push_endpoint }}</code>{% endif %}
+                                </td>
+                                <td>
+                                    {% if sub.dead_letter_topic %}
+                                    <a href="/gcpstatus/topics/{{ sub.dead_letter_topic.split('/')[-1] }}">{{ sub.dead_letter_topic.split('/')[-1] }}</a>
+                                    {% endif %}
+                                </td>
+                                <td>{{ sub.max_delivery_attempts or '' }}</td>
+                            </tr>
+                            {% else %}
+                            <tr><td colspan="5" class="text-muted">No subscriptions</td></tr>
+                            {% endfor %}
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+        </div>
+        {% if topic.dead_letter_sources %}
+        <div class="card">
+            <div class="card-header">
+                <h5 class="mb-0">Dead-letter target for</h5>
+            </div>
+            <div class="card-body">
+                <ul class="mb-0">
+                    {% for sub in topic.dead_letter_sources %}
+                    <li>
+                        <code>{{ sub.name.split('/')[-1] }}</code> on
+                        <a href="/gcpstatus/topics/{{ sub.topic.split('/')[-1] }}">{{ sub.topic.split('/')[-1] }}</a>
+                        after {{ sub.max_delivery_attempts }} attempts
+                    </li>
+                    {% endfor %}
+                </ul>
+            </div>
+        </div>
+        {% endif %}
+    </div>
+    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
+</body>
+</html>
+'''
+
 # Update Subscription Template
 SUBS_TEMPLATE = '''
 <!DOCTYPE html>
@@ -281,12 +965,12 @@ SUBS_TEMPLATE = '''
                             {% for sub in subscriptions %}
                             <tr>
                                 <td>{{ sub.name.split('/')[-1] }}</td>
-                                <td><code>{{ sub.topic.split('/')[-1] }}</code></td>
-                                <td><span class="badge bg-{{ 'info' if sub.push_config else 'secondary' }}">{{ 'Push' if sub.push_config else 'Pull' }}</span></td>
-                                <td>{{ sub.message_retention_duration.seconds | default(604800) }} seconds</td>
-                                <td><span class="badge bg-{{ 'success' if sub.enable_message_ordering else 'secondary' }}">{{ 'Enabled' if sub.enable_message_ordering else 'Disabled' }}</span></td>
-                                <td><span class="badge bg-{{ 'success' if sub.enable_exactly_once_delivery else 'secondary' }}">{{ 'Enabled' if sub.enable_exactly_once_delivery else 'Disabled' }}</span></td>
-                                <td>{{ sub.expiration_policy.ttl.seconds if sub.expiration_policy else 'Never' }}</td>
+                                <td><a href="/gcpstatus/topics/{{ sub.topic.split('/')[-1] }}"><code>{{ sub.topic.split('/')[-1] }}</code></a></td>
+                                <td><span class="badge bg-{{ {'Push': 'info', 'BigQuery': 'success'}.get(sub.delivery, 'secondary') }}">{{ sub.delivery }}</span></td>
+                                <td>{{ sub.retention_seconds }} seconds</td>
+                                <td><span class="badge bg-{{ 'success' if sub.message_ordering else 'secondary' }}">{{ 'Enabled' if sub.message_ordering else 'Disabled' }}</span></td>
+                                <td><span class="badge bg-{{ 'success' if sub.exactly_once else 'secondary' }}">{{ 'Enabled' if sub.exactly_once else 'Disabled' }}</span></td>
+                                <td>{{ sub.expiration_seconds if sub.expiration_seconds else 'Never' }}</td>
                             </tr>
                             {% endfor %}
                         </tbody>
@@ -332,6 +1016,8 @@ GKE_DEPLOYMENTS_TEMPLATE = '''
                             <tr>
                                 <th>Deployment Name</th>
                                 <th>Pods</th>
+                                <th>CPU (m) used / req / limit</th>
+                                <th>Memory (MiB) used / req / limit</th>
                                 <th>Releases</th>
                                 <th>Status</th>
                             </tr>
@@ -341,6 +1027,13 @@ GKE_DEPLOYMENTS_TEMPLATE = '''
                             <tr>
                                 <td>{{ deployment.name }}</td>
                                 <td><a href="/gcpstatus/gke/pods/{{ deployment.name }}?namespace={{ namespace }}" class="text-decoration-none">{{ deployment.pods }}</a></td>
+                                {% if metrics_available %}
+                                <td class="text-end">{{ '%.0f' | format(deployment.cpu_usage * 1000) }} / {{ '%.0f' | format(deployment.cpu_request * 1000) if deployment.cpu_request else '-' }} / {{ '%.0f' | format(deployment.cpu_limit * 1000) if deployment.cpu_limit else '-' }}</td>
+                                <td class="text-end">{{ '%.0f' | format(deployment.memory_usage / 1024**2) }} / {{ '%.0f' | format(deployment.memory_request / 1024**2) if deployment.memory_request else '-' }} / {{ '%.0f' | format(deployment.memory_limit / 1024**2) if deployment.memory_limit else '-' }}</td>
+                                {% else %}
+                                <td class="text-muted">n/a</td>
+                                <td class="text-muted">n/a</td>
+                                {% endif %}
                                 <td><a href="/gcpstatus/gke/releases/{{ deployment.name }}?namespace={{ namespace }}" class="text-decoration-none">View Images</a></td>
                                 <td><span class="badge bg-{{ 'success' if deployment.status == 'UP' else 'danger' }}">{{ deployment.status }}</span></td>
                             </tr>
@@ -400,8 +1093,9 @@ POD_DETAILS_TEMPLATE = '''
             </ol>
         </nav>
         <div class="card">
-            <div class="card-header">
+            <div class="card-header d-flex justify-content-between align-items-center">
                 <h4 class="mb-0">Pods for {{ deployment_name }}</h4>
+                <a href="/gcpstatus/gke/pods/{{ deployment_name }}/logs?namespace={{ namespace }}" class="btn btn-sm btn-outline-primary">Tail All Logs</a>
             </div>
             <div class="card-body">
                 <div class="table-responsive">
@@ -412,16 +1106,25 @@ POD_DETAILS_TEMPLATE = '''
                                 <th>Status</th>
                                 <th>Ready</th>
                                 <th>Restarts</th>
+                                <th>CPU (m)</th>
+                                <th>Memory (MiB)</th>
                                 <th>Age</th>
                             </tr>
                         </thead>
                         <tbody>
                             {% for pod in pods %}
                             <tr>
-                                <td>{{ pod.name }}</td>
+                                <td>{{ pod.name }} <a href="/gcpstatus/gke/pods/{{ deployment_name }}/logs/{{ pod.name }}?namespace={{ namespace }}" class="text-decoration-none small">logs</a></td>
                                 <td><span class="badge bg-{{ 'success' if pod.status == 'Running' else 'warning' }}">{{ pod.status }}</span></td>
-                                <td>{{ pod.ready }}</td>
+                                <td>{{ pod.ready_count }}/{{ pod.container_count }}</td>
                                 <td>{{ pod.restarts }}</td>
+                                {% if pod.cpu_usage is not none %}
+                                <td><span class="badge bg-{{ 'danger' if resources.cpu_limit and pod.cpu_usage > resources.cpu_limit else 'warning' if resources.cpu_request and pod.cpu_usage > resources.cpu_request else 'light text-dark' }}">{{ '%.0f' | format(pod.cpu_usage * 1000) }}</span> / {{ '%.0f' | format(resources.cpu_request * 1000) if resources.cpu_request else '-' }}</td>
+                                <td><span class="badge bg-{{ 'danger' if resources.memory_limit and pod.memory_usage > resources.memory_limit else 'warning' if resources.memory_request and pod.memory_usage > resources.memory_request else 'light text-dark' }}">{{ '%.0f' | format(pod.memory_usage / 1024**2) }}</span> / {{ '%.0f' | format(resources.memory_request / 1024**2) if resources.memory_request else '-' }}</td>
+                                {% else %}
+                                <td class="text-muted">n/a</td>
+                                <td class="text-muted">n/a</td>
+                                {% endif %}
                                 <td>{{ pod.age }}</td>
                             </tr>
                             {% endfor %}
@@ -452,7 +1155,7 @@ RELEASE_DETAILS_TEMPLATE = '''
                 <li class="breadcrumb-item active">{{ deployment_name }}</li>
             </ol>
         </nav>
-        <div class="card">
+        <div class="card mb-4">
             <div class="card-header">
                 <h4 class="mb-0">Container Images for {{ deployment_name }}</h4>
             </div>
@@ -463,15 +1166,73 @@ RELEASE_DETAILS_TEMPLATE = '''
                             <tr>
                                 <th>Container Name</th>
                                 <th>Image</th>
-                                <th>Image ID</th>
+                                <th>Running Image ID</th>
+                                <th>Pods</th>
                             </tr>
                         </thead>
                         <tbody>
                             {% for container in containers %}
+                            {% for digest, pods in container.digests.items() %}
+                            <tr>
+                                {% if loop.first %}
+                                <td rowspan="{{ container.digests|length }}">
+                                    {{ container.name }}
+                                    {% if container.drift %}<span class="badge bg-warning text-dark">Drift</span>{% endif %}
+                                </td>
+                                <td rowspan="{{ container.digests|length }}"><code>{{ container.image }}</code></td>
+                                {% endif %}
+                                <td>{% if digest %}<code>{{ digest }}</code>{% else %}<span class="text-muted">Not started</span>{% endif %}</td>
+                                <td title="{{ pods|join(', ') }}">{{ pods|length }} / {{ pod_count }}</td>
+                            </tr>
+                            {% else %}
                             <tr>
                                 <td>{{ container.name }}</td>
                                 <td><code>{{ container.image }}</code></td>
-                                <td><code>{{ container.image_id }}</code></td>
+                                <td colspan="2" class="text-muted">No pods</td>
+                            </tr>
+                            {% endfor %}
+                            {% endfor %}
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+        </div>
+        <div class="card">
+            <div class="card-header">
+                <h4 class="mb-0">Rollout History</h4>
+            </div>
+            <div class="card-body">
+                <div class="table-responsive">
+                    <table class="table table-striped table-hover">
+                        <thead class="table-dark">
+                            <tr>
+                                <th>Revision</th>
+                                <th>ReplicaSet</th>
+                                <th>Images</th>
+                                <th>Replicas</th>
+                                <th>Created</th>
+                                <th>Change Cause</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+                            {% for rs in history %}
+                            <tr>
+                                <td>
+                                    {{ rs.revision }}
+                                    {% if loop.first %}<span class="badge bg-success">current</span>{% endif %}
+                                </td>
+                                <td>{{ rs.name }}</td>
+                                <td>
+                                    {% for name, image, digests in rs.images %}
+                                    <div>
+                                        <code>{{ image }}</code>
+                                        {% for digest in digests %}<br><small class="text-muted">{{ digest }}</small>{% endfor %}
+                                    </div>
+                                    {% endfor %}
+                                </td>
+                                <td>{{ rs.ready_replicas }} / {{ rs.replicas }}</td>
+                                <td>{{ rs.created }}</td>
+                                <td>{{ rs.change_cause }}</td>
                             </tr>
                             {% endfor %}
                         </tbody>
@@ -522,6 +1283,56 @@ COMPOSER_ENVIRONMENT_TEMPLATE = '''
 '''
 
 
+DAG_STATUS_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>DAG Runs</title>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
+</head>
+<body>
+    """ + NAV_TEMPLATE + """
+    <div class="container">
+        <h1 class="mt-5">DAG Runs <small class="text-muted">(last {{ lookback_hours }}h)</small></h1>
+        {% for env in environments %}
+            <h3 class="mt-4">{{ env.name }}</h3>
+            {% if env.error %}
+                <div class="alert alert-danger">{{ env.error }}</div>
+            {% else %}
+            <table class="table table-sm table-striped table-hover">
+                <thead class="table-dark">
+                    <tr>
+                        <th>DAG</th>
+                        <th>Last Run</th>
+                        <th>Execution Date</th>
+                        <th>Ended</th>
+                        <th>Failed Tasks</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    {% for dag in env.dags %}
+                    <tr>
+                        <td>{{ dag.dag_id }}{% if dag.is_paused %} <span class="badge bg-secondary">paused</span>{% endif %}</td>
+                        <td><span class="badge bg-{{ {'success': 'success', 'failed': 'danger', 'running': 'primary', 'queued': 'info', 'unknown': 'warning'}.get(dag.state, 'light text-dark') }}">{{ dag.state or 'no runs' }}</span></td>
+                        <td>{{ dag.execution_date or '' }}</td>
+                        <td>{{ dag.end_date or '' }}</td>
+                        <td>{% for task in dag.failed_tasks %}<code>{{ task }}</code> {% endfor %}</td>
+                    </tr>
+                    {% endfor %}
+                </tbody>
+            </table>
+            {% endif %}
+        {% else %}
+            <p>No environments found.</p>
+        {% endfor %}
+    </div>
+</body>
+</html>
+"""
+
+
 COMPOSER_LIST_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="en">
@@ -535,6 +1346,7 @@ COMPOSER_LIST_TEMPLATE = """
     """ + NAV_TEMPLATE + """
     <div class="container">
         <h1 class="mt-5">Composer Environments</h1>
+        <p><a href="/gcpstatus/composer/dags">DAG run status for all environments</a></p>
         {% if environments %}
             <ul class="list-group">
                 {% for env in environments %}
@@ -556,21 +1368,19 @@ COMPOSER_LIST_TEMPLATE = """
 
 
 @app.route('/gcpstatus/')
+@cached_response()
 def list_datasets():
     try:
         client = bigquery.Client()
         datasets = []
         for dataset in client.list_datasets():
-            datasets.append({
-                'dataset_id': dataset.dataset_id,
-                'project': dataset.project,
-                'full_dataset_id': f"{dataset.project}.{dataset.dataset_id}"
-            })
+            datasets.append(DatasetRecord(dataset.dataset_id, dataset.project))
         return render_template_string(HTML_TEMPLATE, datasets=datasets)
     except Exception as e:
         return f"Error: {str(e)}", 500
 
 @app.route('/gcpstatus/tables/<project>/<dataset_id>')
+@cached_response()
 def list_tables(project, dataset_id):
     try:
         client = bigquery.Client()
@@ -579,13 +1389,12 @@ def list_tables(project, dataset_id):
         
         for table in client.list_tables(dataset_ref):
             table_full = client.get_table(table)
-            tables.append({
-                'table_id': table.table_id,
-                'type': table_full.table_type,
-                'created': table_full.created.strftime('%Y-%m-%d %H:%M:%S'),
-                'num_rows': f"{table_full.num_rows:,}",
-                'size_gb': f"{table_full.num_bytes / 1024**3:.2f}"
-            })
+            tables.append(TableRecord(
+                table.table_id,
+                table_full.table_type,
+                table_full.created,
+                table_full.num_rows or 0,
+                table_full.num_bytes or 0))
             
         return render_template_string(TABLES_TEMPLATE, 
                                    tables=tables,
@@ -595,6 +1404,7 @@ def list_tables(project, dataset_id):
         return f"Error: {str(e)}", 500
 
 @app.route('/gcpstatus/schema/<project>/<dataset_id>/<table_id>')
+@cached_response()
 def show_schema(project, dataset_id, table_id):
     try:
         client = bigquery.Client()
@@ -605,46 +1415,329 @@ def show_schema(project, dataset_id, table_id):
                                    project=project,
                                    dataset_id=dataset_id,
                                    table_id=table_id,
-                                   schema=table.schema)
+                                   schema=[SchemaFieldRecord.from_field(field) for field in table.schema])
+    except Exception as e:
+        return f"Error: {str(e)}", 500
+
+def stream_template_buffered(source, buffer_size=64, **context):
+    """Stream a template in chunks of `buffer_size` output pieces instead of one per piece"""
+    app.update_template_context(context)
+    stream = app.jinja_env.from_string(source).stream(context)
+    stream.enable_buffering(buffer_size)
+    return stream_with_context(stream)
+
+def open_preview_session(project, dataset_id, table_id, columns, row_restriction):
+    """Create a single-stream Arrow read session for a table"""
+    read_client = bigquery_storage.BigQueryReadClient()
+    read_options = bigquery_storage.types.ReadSession.TableReadOptions(
+        selected_fields=columns,
+        row_restriction=row_restriction or '')
+    requested_session = bigquery_storage.types.ReadSession(
+        table=f"projects/{project}/datasets/{dataset_id}/tables/{table_id}",
+        data_format=bigquery_storage.types.DataFormat.ARROW,
+        read_options=read_options)
+    session = read_client.create_read_session(
+        parent=f"projects/{PROJECT_ID}",
+        read_session=requested_session,
+        max_stream_count=1)
+    schema = pa.ipc.read_schema(pa.py_buffer(session.arrow_schema.serialized_schema))
+    return read_client, session, schema
+
+def iter_preview_batches(read_client, session, limit, max_bytes=PREVIEW_MAX_BYTES):
+    """Yield Arrow record batches until `limit` rows or `max_bytes` are read"""
+    if not session.streams:
+        return
+    remaining = limit
+    budget = max_bytes
+    reader = read_client.read_rows(session.streams[0].name)
+    for page in reader.rows(session).pages:
+        batch = page.to_arrow()
+        if batch.num_rows > remaining:
+            batch = batch.slice(0, remaining)
+        yield batch
+        remaining -= batch.num_rows
+        budget -= batch.nbytes
+        if remaining <= 0 or budget <= 0:
+            break
+
+def iter_preview_rows(batches):
+    for batch in batches:
+        # Format temporal columns in Arrow, converting them per value in Python is slow
+        columns = [
+            pc.cast(column, pa.string()) if pa.types.is_temporal(column.type) else column
+            for column in batch.columns
+        ]
+        yield from pa.RecordBatch.from_arrays(columns, names=batch.schema.names).to_pylist()
+
+@app.route('/gcpstatus/preview/<project>/<dataset_id>/<table_id>')
+def preview_table(project, dataset_id, table_id):
+    try:
+        limit = max(1, min(request.args.get('limit', PREVIEW_DEFAULT_ROWS, type=int), PREVIEW_MAX_ROWS))
+        columns = [c.strip() for c in request.args.get('columns', '').split(',') if c.strip()]
+        row_restriction = request.args.get('where', '')
+        read_client, session, schema = open_preview_session(
+            project, dataset_id, table_id, columns, row_restriction)
+        rows = iter_preview_rows(iter_preview_batches(read_client, session, limit))
+
+        if request.args.get('format') == 'json':
+            def generate():
+                yield json.dumps({'columns': schema.names})[:-1] + ', "rows": ['
+                for i, row in enumerate(rows):
+                    yield (',' if i else '') + json.dumps(row, default=str)
+                yield ']}'
+            return Response(stream_with_context(generate()), mimetype='application/json')
+
+        return Response(stream_template_buffered(PREVIEW_TEMPLATE,
+                                   rows=rows,
+                                   columns=schema.names,
+                                   limit=limit,
+                                   row_restriction=row_restriction,
+                                   project=project,
+                                   dataset_id=dataset_id,
+                                   table_id=table_id))
+    except Exception as e:
+        return f"Error: {str(e)}", 500
+
+TABLE_STORAGE_QUERY = """
+SELECT
+    '{region}' AS region,
+    table_schema,
+    table_name,
+    total_rows,
+    total_logical_bytes,
+    active_logical_bytes,
+    long_term_logical_bytes
+FROM `{project}`.`region-{region}`.INFORMATION_SCHEMA.TABLE_STORAGE
+WHERE NOT deleted
+"""
+
+# Project ids (optionally domain-scoped) and BigQuery locations, as they are pasted into the SQL text
+PROJECT_ID_PATTERN = re.compile(r'(?:[a-z][a-z0-9.-]*[a-z0-9]:)?[a-z][a-z0-9-]{4,28}[a-z0-9]')
+REGION_PATTERN = re.compile(r'[a-z]+(?:-[a-z]+[0-9]+)?')
+
+ROW_BUCKET_EDGES = [1, 1_000, 1_000_000, 1_000_000_000]
+ROW_BUCKET_LABELS = ['Empty', '1 - 999', '1K - 1M', '1M - 1B', '1B+']
+
+def query_table_storage(project, regions):
+    """Fetch TABLE_STORAGE for every region as one Arrow table"""
+    if not PROJECT_ID_PATTERN.fullmatch(project):
+        raise ValueError(f"invalid project id: {project!r}")
+    for region in regions:
+        if not REGION_PATTERN.fullmatch(region):
+            raise ValueError(f"invalid BigQuery region: {region!r}")
+    client = bigquery.Client()
+    tables = [
+        client.query(TABLE_STORAGE_QUERY.format(project=project, region=region)).to_arrow()
+        for region in regions
+    ]
+    return pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+
+def summarize_table_storage(storage):
+    """Aggregate a TABLE_STORAGE Arrow table column-wise"""
+    byte_columns = ['total_logical_bytes', 'active_logical_bytes', 'long_term_logical_bytes']
+    storage = storage.set_column(
+        storage.schema.get_field_index('total_rows'), 'total_rows',
+        pc.fill_null(storage['total_rows'], 0))
+
+    per_dataset = storage.group_by('table_schema').aggregate(
+        [('table_name', 'count'), ('total_rows', 'sum')] + [(col, 'sum') for col in byte_columns])
+    per_dataset = per_dataset.rename_columns(
+        [name.replace('_sum', '').replace('table_name_count', 'table_count') for name in per_dataset.column_names])
+    per_dataset = per_dataset.sort_by([('total_logical_bytes', 'descending')])
+
+    rows = storage['total_rows'].to_numpy()
+    buckets = np.bincount(np.digitize(rows, ROW_BUCKET_EDGES), minlength=len(ROW_BUCKET_LABELS))
+
+    summary = {
+        'table_count': storage.num_rows,
+        'total_rows': int(rows.sum()),
+        'datasets': per_dataset.to_pylist(),
+        'row_distribution': list(zip(ROW_BUCKET_LABELS, buckets.tolist())),
+    }
+    for col in byte_columns:
+        summary[col] = pc.sum(storage[col]).as_py() or 0
+    return summary
+
+def largest_tables(storage, top_n):
+    """The `top_n` largest tables by logical bytes, largest first"""
+    if not storage.num_rows or top_n <= 0:
+        return []
+    top = pc.select_k_unstable(storage, min(top_n, storage.num_rows), [('total_logical_bytes', 'descending')])
+    return storage.take(top).sort_by([('total_logical_bytes', 'descending')]).to_pylist()
+
+@app.route('/gcpstatus/storage')
+@cached_response('storage', args=('project', 'top'))
+def storage_summary():
+    try:
+        project = request.args.get('project', PROJECT_ID)
+        if not PROJECT_ID_PATTERN.fullmatch(project):
+            return "Error: invalid project id", 400
+        top_n = max(0, min(request.args.get('top', 20, type=int), STORAGE_MAX_TOP))
+        regions = tuple(BQ_REGIONS)
+
+        def load():
+            storage = query_table_storage(project, regions)
+            return storage, summarize_table_storage(storage)
+
+        # The billed query runs once per (project, regions); ?top= is applied to the cached table
+        storage, summary = storage_summary_cache.get_or_load((project, regions), purging(load, 'storage'))
+        return render_template_string(STORAGE_TEMPLATE,
+                                   summary=dict(summary, largest=largest_tables(storage, top_n)),
+                                   project=project,
+                                   regions=regions)
     except Exception as e:
         return f"Error: {str(e)}", 500
 
 # New routes for Pub/Sub
+def build_topic_graph(project):
+    """Join one list_topics and one list_subscriptions pass into topic nodes.
+
+    Returns (topics, orphans): TopicNode by full topic name, and subscriptions
+    whose topic has been deleted.
+    """
+    project_path = f"projects/{project}"
+    publisher = pubsub_v1.PublisherClient()
+    topics = {topic.name: TopicNode(topic.name, [], [])
+              for topic in publisher.list_topics(request={"project": project_path})}
+    orphans = []
+    subscriber = pubsub_v1.SubscriberClient()
+    for sub in subscriber.list_subscriptions(request={"project": project_path}):
+        record = SubscriptionRecord.from_proto(sub)
+        node = topics.get(record.topic)
+        if node is None:
+            orphans.append(record)
+        else:
+            node.subscriptions.append(record)
+        target = topics.get(record.dead_letter_topic)
+        if target is not None:
+            target.dead_letter_sources.append(record)
+    return topics, orphans
+
+def get_topic_graph(project):
+    return pubsub_cache.get_or_load(project, purging(lambda: build_topic_graph(project), 'pubsub'))
+
 @app.route('/gcpstatus/topics')
+@cached_response('pubsub')
 def list_topics():
     try:
-        publisher = pubsub_v1.PublisherClient()
-        project_path = f"projects/{PROJECT_ID}"
-        topics = []
-        for topic in publisher.list_topics(request={"project": project_path}):
-            topics.append({
-                'name': topic.name
-            })
-        return render_template_string(TOPICS_TEMPLATE, topics=topics)
+        topics, orphans = get_topic_graph(PROJECT_ID)
+        return render_template_string(TOPICS_TEMPLATE, topics=list(topics.values()), orphans=orphans)
+    except Exception as e:
+        return f"Error: {str(e)}", 500
+
+@app.route('/gcpstatus/topics/<topic_id>')
+@cached_response('pubsub')
+def show_topic(topic_id):
+    try:
+        topics, _ = get_topic_graph(PROJECT_ID)
+        topic = topics.get(f"projects/{PROJECT_ID}/topics/{topic_id}")
+        if topic is None:
+            return f"Error: topic {topic_id} not found", 404
+        return render_template_string(TOPIC_DETAILS_TEMPLATE, topic=topic)
     except Exception as e:
         return f"Error: {str(e)}", 500
 
 @app.route('/gcpstatus/subscriptions')
+@cached_response()
 def list_subscriptions():
     try:
         subscriber = pubsub_v1.SubscriberClient()
         project_path = f"projects/{PROJECT_ID}"
         subscriptions = []
         for sub in subscriber.list_subscriptions(request={"project": project_path}):
-            subscriptions.append({
-                'name': sub.name,
-                'topic': sub.topic,
-                'push_config': sub.push_config,
-                'message_retention_duration': sub.message_retention_duration,
-                'enable_message_ordering': sub.enable_message_ordering,
-                'enable_exactly_once_delivery': sub.enable_exactly_once_delivery,
-                'expiration_policy': sub.expiration_policy
-            })
+            subscriptions.append(SubscriptionRecord.from_proto(sub))
         return render_template_string(SUBS_TEMPLATE, subscriptions=subscriptions)
     except Exception as e:
         return f"Error: {str(e)}", 500
 
+def selector_matches(match_labels, labels):
+    """True when `labels` satisfy a deployment's matchLabels selector"""
+    labels = labels or {}
+    return all(labels.get(k) == v for k, v in (match_labels or {}).items())
+
+def build_selector_index(selectors):
+    """Return a function mapping a label dict to the index of the first matching selector, or -1"""
+    candidates = {}
+    for i, match_labels in enumerate(selectors):
+        if match_labels:
+            key = min(match_labels.items())
+            candidates.setdefault(key, []).append(i)
+
+    def lookup(labels):
+        labels = labels or {}
+        found = [i for item in labels.items() for i in candidates.get(item, ())
+                 if selector_matches(selectors[i], labels)]
+        return min(found) if found else -1
+    return lookup
+
+def list_pod_metrics(namespace, label_selector=None):
+    """List PodMetrics for a namespace in one metrics.k8s.io call, or None if metrics are unavailable"""
+    custom_api = client.CustomObjectsApi()
+    try:
+        kwargs = {'label_selector': label_selector} if label_selector else {}
+        result = custom_api.list_namespaced_custom_object(
+            'metrics.k8s.io', 'v1beta1', namespace, 'pods', _request_timeout=METRICS_TIMEOUT, **kwargs)
+        return result.get('items', [])
+    except client.exceptions.ApiException as e:
+        logger.warning(f"metrics.k8s.io unavailable for namespace {namespace}: {e.status} {e.reason}")
+        return None
+    except (urllib3.exceptions.HTTPError, OSError) as e:
+        # Connection errors and timeouts against metrics-server
+        logger.warning(f"metrics.k8s.io unreachable for namespace {namespace}: {e}")
+        return None
+
+def container_resources(containers):
+    """Per-pod CPU (cores) and memory (bytes) requests and limits summed over containers"""
+    totals = {'cpu_request': 0.0, 'cpu_limit': 0.0, 'memory_request': 0.0, 'memory_limit': 0.0}
+    for container in containers:
+        resources = container.resources
+        for kind in ('requests', 'limits'):
+            values = getattr(resources, kind, None) or {}
+            suffix = 'request' if kind == 'requests' else 'limit'
+            for resource in ('cpu', 'memory'):
+                if resource in values:
+                    totals[f"{resource}_{suffix}"] += float(parse_quantity(values[resource]))
+    return totals
+
+def aggregate_pod_metrics(pod_metrics, group_of):
+    """Sum container usage per pod and per group
+
+    `group_of` maps a PodMetrics item to a group index (or -1 to skip).
+    Returns (per_pod, cpu_by_group, memory_by_group, pods_by_group) where
+    per_pod maps pod name to (cpu cores, memory bytes).
+    """
+    pod_names = []
+    pod_groups = []
+    container_pod = []
+    cpu = []
+    memory = []
+    for item in pod_metrics:
+        group = group_of(item)
+        if group < 0:
+            continue
+        pod_index = len(pod_names)
+        pod_names.append(item['metadata']['name'])
+        pod_groups.append(group)
+        for container in item.get('containers', []):
+            container_pod.append(pod_index)
+            cpu.append(float(parse_quantity(container['usage'].get('cpu', '0'))))
+            memory.append(float(parse_quantity(container['usage'].get('memory', '0'))))
+
+    container_pod = np.asarray(container_pod, dtype=np.int64)
+    pod_cpu = np.bincount(container_pod, weights=np.asarray(cpu, dtype=np.float64), minlength=len(pod_names))
+    pod_memory = np.bincount(container_pod, weights=np.asarray(memory, dtype=np.float64), minlength=len(pod_names))
+
+    pod_groups = np.asarray(pod_groups, dtype=np.int64)
+    groups = int(pod_groups.max()) + 1 if len(pod_groups) else 0
+    cpu_by_group = np.bincount(pod_groups, weights=pod_cpu, minlength=groups)
+    memory_by_group = np.bincount(pod_groups, weights=pod_memory, minlength=groups)
+    pods_by_group = np.bincount(pod_groups, minlength=groups)
+
+    per_pod = dict(zip(pod_names, zip(pod_cpu.tolist(), pod_memory.tolist())))
+    return per_pod, cpu_by_group, memory_by_group, pods_by_group
+
 @app.route('/gcpstatus/gke/deployments')
+@cached_response('namespace/{namespace}', args=('namespace',))
 def list_deployments():
     try:
         namespace = request.args.get('namespace', GKE_NAMESPACE)
@@ -652,34 +1745,53 @@ def list_deployments():
         apps_v1 = client.AppsV1Api()
         core_v1 = client.CoreV1Api()
         
-        deployments = []
-        deploy_list = apps_v1.list_namespaced_deployment(namespace)
+        deploy_list = apps_v1.list_namespaced_deployment(namespace).items
+        selectors = [deploy.spec.selector.match_labels for deploy in deploy_list]
+        deployment_of = build_selector_index(selectors)
+
+        # One pod list and one metrics list for the whole namespace, matched in memory
+        pods = core_v1.list_namespaced_pod(namespace).items
+        purge_on_tag_move(namespace, pods)
+        running = np.zeros(len(deploy_list), dtype=np.int64)
+        for pod in pods:
+            if pod.status.phase == 'Running':
+                index = deployment_of(pod.metadata.labels)
+                if index >= 0:
+                    running[index] += 1
+
+        pod_metrics = list_pod_metrics(namespace)
+        metrics_available = pod_metrics is not None
+        if metrics_available:
+            _, cpu_usage, memory_usage, reporting = aggregate_pod_metrics(
+                pod_metrics, lambda item: deployment_of(item['metadata'].get('labels')))
         
-        for deploy in deploy_list.items:
-            selector = deploy.spec.selector.match_labels
-            selector_str = ','.join([f"{k}={v}" for k, v in selector.items()])
-            
-            pod_list = core_v1.list_namespaced_pod(
-                namespace,
-                label_selector=selector_str
-            )
-            
-            running_pods = sum(1 for pod in pod_list.items if pod.status.phase == 'Running')
-            
-            deployments.append({
+        deployments = []
+        for i, deploy in enumerate(deploy_list):
+            running_pods = int(running[i])
+            entry = {
                 'name': deploy.metadata.name,
                 'pods': running_pods,
                 'status': 'UP' if running_pods > 0 else 'DOWN'
-            })
+            }
+            if metrics_available:
+                per_pod = container_resources(deploy.spec.template.spec.containers)
+                pods_reporting = int(reporting[i]) if i < len(reporting) else 0
+                entry['cpu_usage'] = float(cpu_usage[i]) if i < len(cpu_usage) else 0.0
+                entry['memory_usage'] = float(memory_usage[i]) if i < len(memory_usage) else 0.0
+                for key, value in per_pod.items():
+                    entry[key] = value * pods_reporting
+            deployments.append(entry)
             
         return render_template_string(GKE_DEPLOYMENTS_TEMPLATE, 
                                    deployments=deployments,
+                                   metrics_available=metrics_available,
                                    namespace=namespace)
     except Exception as e:
         return f"Error: {str(e)}", 500
 
 # Add routes for pod and release details
 @app.route('/gcpstatus/gke/pods/<deployment_name>')
+@cached_response('namespace/{namespace}', args=('namespace',))
 def show_pods(deployment_name):
     try:
         namespace = request.args.get('namespace', GKE_NAMESPACE)
@@ -699,6 +1811,11 @@ def show_pods(deployment_name):
         selector_str = ','.join([f"{k}={v}" for k, v in selector.items()])
         
         pod_list = core_v1.list_namespaced_pod(namespace, label_selector=selector_str)
+        pod_metrics = list_pod_metrics(namespace, label_selector=selector_str)
+        usage = {}
+        if pod_metrics is not None:
+            usage, _, _, _ = aggregate_pod_metrics(
+                pod_metrics, lambda item: 0 if selector_matches(selector, item['metadata'].get('labels')) else -1)
         
         pods = []
         for pod in pod_list.items:
@@ -706,52 +1823,381 @@ def show_pods(deployment_name):
             ready_count = sum(1 for c in containers if c.ready)
             total_count = len(containers)
             
-            pods.append({
-                'name': pod.metadata.name,
-                'status': pod.status.phase,
-                'ready': f"{ready_count}/{total_count}",
-                'restarts': sum(c.restart_count for c in containers),
-                'age': pod.metadata.creation_timestamp
-            })
+            cpu_usage, memory_usage = usage.get(pod.metadata.name, (None, None))
+            pods.append(PodRecord(
+                pod.metadata.name,
+                pod.status.phase,
+                ready_count,
+                total_count,
+                sum(c.restart_count for c in containers),
+                pod.metadata.creation_timestamp,
+                cpu_usage,
+                memory_usage))
             
         return render_template_string(POD_DETAILS_TEMPLATE, 
                                    pods=pods,
+                                   resources=container_resources(deploy.spec.template.spec.containers),
                                    deployment_name=deployment_name,
                                    namespace=namespace)
     except Exception as e:
         return f"Error: {str(e)}", 500
 
 @app.route('/gcpstatus/gke/releases/<deployment_name>')
+@cached_response('namespace/{namespace}', args=('namespace',))
 def show_releases(deployment_name):
     try:
         namespace = request.args.get('namespace', GKE_NAMESPACE)
         config.load_kube_config()
         apps_v1 = client.AppsV1Api()
-        
+        core_v1 = client.CoreV1Api()
+
         try:
             deploy = apps_v1.read_namespaced_deployment(deployment_name, namespace)
         except client.exceptions.ApiException as e:
             if e.status == 404:
                 return f"Deployment {deployment_name} not found in namespace {namespace}", 404
             raise e
-            
-        containers = []
-        for container in deploy.spec.template.spec.containers:
-            containers.append({
-                'name': container.name,
-                'image': container.image,
-                'image_id': container.image
-            })
-            
-        return render_template_string(RELEASE_DETAILS_TEMPLATE, 
+
+        selector_str = ','.join([f"{k}={v}" for k, v in deploy.spec.selector.match_labels.items()])
+        pods = core_v1.list_namespaced_pod(namespace, label_selector=selector_str).items
+        purge_on_tag_move(namespace, pods)
+        containers = running_releases(deploy, pods)
+        replica_sets = apps_v1.list_namespaced_replica_set(namespace, label_selector=selector_str).items
+        history = rollout_history(deploy, replica_sets, pods)
+
+        return render_template_string(RELEASE_DETAILS_TEMPLATE,
                                    containers=containers,
+                                   history=history,
+                                   pod_count=len(pods),
                                    deployment_name=deployment_name,
                                    namespace=namespace)
     except Exception as e:
         return f"Error: {str(e)}", 500
 
+def normalize_image_id(image_id):
+    """Strip the runtime prefix, e.g. docker-pullable://, from a container status imageID"""
+    return (image_id or '').split('://', 1)[-1]
+
+def purge_on_tag_move(namespace, pods):
+    """Purge the namespace's cached pages when the newest pod running a tag has a new digest
+
+    The pages themselves read digests from the pod listing; `tag_watch` only
+    remembers the newest digest per tag to notice the move. Only a pod newer
+    than the one already recorded can change it, so older replicas on a stale
+    digest, or a listing of just some of the pods, never flip it back.
+    """
+    newest = {}
+    for pod in pods:
+        created = pod.metadata.creation_timestamp
+        if created is None:
+            continue
+        images = {container.name: container.image for container in pod.spec.containers}
+        for status in pod.status.container_statuses or []:
+            image_id = normalize_image_id(status.image_id)
+            tag = images.get(status.name)
+            if '@' in image_id and tag and (tag not in newest or created > newest[tag][0]):
+                newest[tag] = (created, image_id)
+
+    moved = False
+    for tag, (created, image_id) in newest.items():
+        previous = tag_watch.get((namespace, tag))
+        if previous is not None and created <= previous[0]:
+            continue
+        tag_watch.set((namespace, tag), (created, image_id))
+        moved = moved or (previous is not None and previous[1] != image_id)
+    if moved:
+        purge_after_request(f"namespace/{namespace}")
+
+def running_releases(deploy, pods):
+    """Group the deployment's pods by the digest each container is actually running"""
+    pods = sorted(pods, key=lambda pod: pod.metadata.creation_timestamp or datetime.min)
+    releases = {
+        container.name: ContainerRelease(container.name, container.image, {})
+        for container in deploy.spec.template.spec.containers
+    }
+    for pod in pods:
+        statuses = {status.name: status for status in pod.status.container_statuses or []}
+        for name, release in releases.items():
+            status = statuses.get(name)
+            digest = normalize_image_id(status.image_id) if status else ''
+            release.digests.setdefault(digest, []).append(pod.metadata.name)
+    return list(releases.values())
+
+def rollout_history(deploy, replica_sets, pods):
+    """Revisions of the deployment's ReplicaSets, newest first
+
+    Digests come from the live pods of each revision, matched on the
+    pod-template-hash label, so revisions sharing a tag never borrow each
+    other's digest. A revision with no live pods shows none.
+    """
+    running = {}  # pod-template-hash -> container name -> digests
+    for pod in pods:
+        template_hash = (pod.metadata.labels or {}).get('pod-template-hash')
+        for status in pod.status.container_statuses or []:
+            digest = normalize_image_id(status.image_id)
+            if template_hash and '@' in digest:
+                running.setdefault(template_hash, {}).setdefault(status.name, set()).add(digest)
+
+    history = []
+    for rs in replica_sets:
+        owners = rs.metadata.owner_references or []
+        if deploy.metadata.uid and not any(owner.uid == deploy.metadata.uid for owner in owners):
+            continue
+        annotations = rs.metadata.annotations or {}
+        digests = running.get((rs.metadata.labels or {}).get('pod-template-hash'), {})
+        history.append(ReplicaSetRevision(
+            int(annotations.get('deployment.kubernetes.io/revision', 0)),
+            rs.metadata.name,
+            [(c.name, c.image, sorted(digests.get(c.name, ()))) for c in rs.spec.template.spec.containers],
+            (rs.status.replicas if rs.status else 0) or 0,
+            (rs.status.ready_replicas if rs.status else 0) or 0,
+            rs.metadata.creation_timestamp,
+            annotations.get('kubernetes.io/change-cause', ''),
+        ))
+    history.sort(key=lambda revision: revision.revision, reverse=True)
+    return history
+
+class LogRingBuffer:
+    """Bounded line buffer shared by log readers
+
+    When the client reads slower than the pods write, the oldest lines are
+    dropped instead of growing the buffer.
+    """
+
+    def __init__(self, maxlen, writers):
+        self._lines = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self.dropped = 0
+        self.writers = writers
+
+    def put(self, line):
+        with self._cond:
+            if len(self._lines) == self._lines.maxlen:
+                self.dropped += 1
+            self._lines.append(line)
+            self._cond.notify()
+
+    def finish(self):
+        """Called by each writer when its stream ends"""
+        with self._cond:
+            self.writers -= 1
+            self._cond.notify()
+
+    def drain(self, timeout):
+        """Wait up to `timeout` seconds for lines, then return (lines, dropped, finished)"""
+        with self._cond:
+            if not self._lines and self.writers > 0:
+                self._cond.wait(timeout)
+            lines = list(self._lines)
+            self._lines.clear()
+            dropped, self.dropped = self.dropped, 0
+            return lines, dropped, self.writers <= 0 and not self._lines
+
+def open_pod_log(core_v1, pod_name, namespace, container, follow, tail_lines, since_seconds=None):
+    """Open a raw, unbuffered log stream for one container
+
+    Reads time out after LOG_IDLE_SECONDS, so a quiet pod cannot block the
+    reading thread forever.
+    """
+    kwargs = {'since_seconds': since_seconds} if since_seconds else {}
+    return core_v1.read_namespaced_pod_log(
+        pod_name, namespace,
+        container=container,
+        follow=follow,
+        tail_lines=tail_lines,
+        _preload_content=False,
+        _request_timeout=(LOG_CONNECT_TIMEOUT, LOG_IDLE_SECONDS),
+        **kwargs)
+
+def iter_pod_log(core_v1, upstream, pod_name, namespace, container, follow, should_stop, streams=None):
+    """Yield raw chunks from an open log stream, and b'' whenever a followed stream goes idle
+
+    An idle read timeout closes the urllib3 connection, so once `should_stop()`
+    has been checked the stream is reopened. Nothing was logged during the last
+    LOG_IDLE_SECONDS, so a short since_seconds window resumes without repeating
+    lines.
+    """
+    try:
+        while True:
+            if streams is not None:
+                streams.append(upstream)
+            try:
+                for chunk in upstream.stream(LOG_CHUNK_BYTES):
+                    yield chunk
+                return
+            except urllib3.exceptions.ReadTimeoutError:
+                if not follow:
+                    raise
+            upstream.release_conn()
+            yield b''
+            if should_stop():
+                return
+            upstream = open_pod_log(core_v1, pod_name, namespace, container, True, None,
+                                    since_seconds=max(1, LOG_IDLE_SECONDS // 2))
+    finally:
+        upstream.close()
+        upstream.release_conn()
+
+def read_deployment(apps_v1, deployment_name, namespace):
+    """Read a deployment, or return None if it does not exist"""
+    try:
+        return apps_v1.read_namespaced_deployment(deployment_name, namespace)
+    except client.exceptions.ApiException as e:
+        if e.status == 404:
+            return None
+        raise e
+
+def log_request_args(deploy):
+    container = request.args.get('container') or deploy.spec.template.spec.containers[0].name
+    tail_lines = max(0, min(request.args.get('tail', LOG_TAIL_LINES, type=int), LOG_BUFFER_LINES))
+    follow = request.args.get('follow', '1') not in ('0', 'false')
+    return container, tail_lines, follow
+
+@app.route('/gcpstatus/gke/pods/<deployment_name>/logs/<pod_name>')
+def tail_pod_log(deployment_name, pod_name):
+    try:
+        namespace = request.args.get('namespace', GKE_NAMESPACE)
+        config.load_kube_config()
+        apps_v1 = client.AppsV1Api()
+        core_v1 = client.CoreV1Api()
+
+        deploy = read_deployment(apps_v1, deployment_name, namespace)
+        if deploy is None:
+            return f"Deployment {deployment_name} not found in namespace {namespace}", 404
+        container, tail_lines, follow = log_request_args(deploy)
+
+        try:
+            upstream = open_pod_log(core_v1, pod_name, namespace, container, follow, tail_lines)
+        except client.exceptions.ApiException as e:
+            if e.status == 404:
+                return f"Pod {pod_name} not found in namespace {namespace}", 404
+            raise e
+
+        def generate():
+            # Chunks are passed straight through: a slow client stops us reading,
+            # which pushes back on the API server instead of buffering here
+            budget = LOG_MAX_BYTES
+            deadline = time.monotonic() + LOG_MAX_SECONDS
+            chunks = iter_pod_log(core_v1, upstream, pod_name, namespace, container, follow,
+                                  should_stop=lambda: time.monotonic() > deadline)
+            try:
+                for chunk in chunks:
+                    if chunk:
+                        chunk = chunk[:budget]
+                        budget -= len(chunk)
+                        yield chunk
+                    if budget <= 0:
+                        yield b"\n[log stream stopped: byte limit reached]\n"
+                        break
+                    if time.monotonic() > deadline:
+                        yield b"\n[log stream stopped: time limit reached]\n"
+                        break
+            finally:
+                chunks.close()
+
+        response = Response(stream_with_context(generate()), mimetype='text/plain')
+        # generate() never runs for a HEAD request or an unread body, so close the stream here too
+        response.call_on_close(upstream.close)
+        return response
+    except Exception as e:
+        return f"Error: {str(e)}", 500
+
+def follow_pod_log(core_v1, pod_name, namespace, container, follow, tail_lines, buffer, stop, streams):
+    """Read one pod's log line by line into a shared ring buffer until EOF or `stop` is set"""
+    prefix = f"[{pod_name}] "
+    chunks = None
+    try:
+        upstream = open_pod_log(core_v1, pod_name, namespace, container, follow, tail_lines)
+        chunks = iter_pod_log(core_v1, upstream, pod_name, namespace, container, follow, stop.is_set, streams)
+        partial = b''
+        for chunk in chunks:
+            if stop.is_set():
+                break
+            *lines, partial = (partial + chunk).split(b'\n')
+            for line in lines:
+                buffer.put(prefix + line.decode('utf-8', 'replace'))
+            # Keep a runaway line from growing without bound
+            if len(partial) > LOG_CHUNK_BYTES:
+                buffer.put(prefix + partial.decode('utf-8', 'replace'))
+                partial = b''
+        if partial and not stop.is_set():
+            buffer.put(prefix + partial.decode('utf-8', 'replace'))
+    except Exception as e:
+        if not stop.is_set():
+            buffer.put(f"{prefix}[error: {e}]")
+    finally:
+        if chunks is not None:
+            chunks.close()
+        buffer.finish()
+
+@app.route('/gcpstatus/gke/pods/<deployment_name>/logs')
+def tail_deployment_logs(deployment_name):
+    try:
+        namespace = request.args.get('namespace', GKE_NAMESPACE)
+        config.load_kube_config()
+        apps_v1 = client.AppsV1Api()
+        core_v1 = client.CoreV1Api()
+
+        deploy = read_deployment(apps_v1, deployment_name, namespace)
+        if deploy is None:
+            return f"Deployment {deployment_name} not found in namespace {namespace}", 404
+        container, tail_lines, follow = log_request_args(deploy)
+
+        selector = deploy.spec.selector.match_labels
+        selector_str = ','.join([f"{k}={v}" for k, v in selector.items()])
+        pod_names = [
+            pod.metadata.name
+            for pod in core_v1.list_namespaced_pod(namespace, label_selector=selector_str).items
+            if pod.status.phase == 'Running'
+        ][:LOG_MAX_PODS]
+
+        buffer = LogRingBuffer(LOG_BUFFER_LINES, writers=len(pod_names))
+        stop = threading.Event()
+        streams = []
+
+        def generate():
+            # Readers start with the body, so a HEAD request or a client that
+            # never reads the body starts none, and the finally below always
+            # runs once they exist
+            budget = LOG_MAX_BYTES
+            deadline = time.monotonic() + LOG_MAX_SECONDS
+            try:
+                for name in pod_names:
+                    threading.Thread(
+                        target=follow_pod_log,
+                        args=(core_v1, name, namespace, container, follow, tail_lines, buffer, stop, streams),
+                        daemon=True).start()
+                yield f"[tailing {len(pod_names)} pods of {deployment_name}]\n"
+                while True:
+                    lines, dropped, finished = buffer.drain(timeout=0.5)
+                    if dropped:
+                        yield f"[{dropped} lines dropped, client is falling behind]\n"
+                    if lines:
+                        text = '\n'.join(lines) + '\n'
+                        data = text.encode('utf-8')[:budget]
+                        budget -= len(data)
+                        yield data
+                    if budget <= 0:
+                        yield "\n[log stream stopped: byte limit reached]\n"
+                        break
+                    if time.monotonic() > deadline:
+                        yield "\n[log stream stopped: time limit reached]\n"
+                        break
+                    if finished:
+                        break
+            finally:
+                # Readers blocked on a quiet follow stream see `stop` within LOG_IDLE_SECONDS
+                stop.set()
+                for upstream in list(streams):
+                    upstream.close()
+
+        return Response(stream_with_context(generate()), mimetype='text/plain')
+    except Exception as e:
+        return f"Error: {str(e)}", 500
+
 # Add route to get namespaces
 @app.route('/gcpstatus/gke/namespaces')
+@cached_response()
 def get_namespaces():
     try:
         config.load_kube_config()
@@ -763,15 +2209,159 @@ def get_namespaces():
 
 
 
+_gcp_credentials = None
+_gcp_credentials_lock = threading.Lock()
+
 def get_gcp_token():
-    """Helper function to get GCP access token"""
-    import google.auth
-    import google.auth.transport.requests
-    
-    credentials, project = google.auth.default()
-    auth_req = google.auth.transport.requests.Request()
-    credentials.refresh(auth_req)
-    return credentials.token
+    """Helper function to get GCP access token, refreshed only once it has expired"""
+    global _gcp_credentials
+    with _gcp_credentials_lock:
+        if _gcp_credentials is None:
+            _gcp_credentials, _ = google.auth.default(
+                scopes=['https://www.googleapis.com/auth/cloud-platform'])
+        if not _gcp_credentials.valid:
+            _gcp_credentials.refresh(google.auth.transport.requests.Request())
+        return _gcp_credentials.token
+
+# Shared, pooled HTTP session for the Airflow REST APIs. Every Airflow call runs on
+# airflow_executor, so AIRFLOW_MAX_CONCURRENCY caps the whole process, not each request
+airflow_executor = ThreadPoolExecutor(max_workers=AIRFLOW_MAX_CONCURRENCY, thread_name_prefix='airflow')
+airflow_session = requests.Session()
+airflow_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=AIRFLOW_MAX_CONCURRENCY, pool_maxsize=AIRFLOW_MAX_CONCURRENCY)
+airflow_session.mount('https://', airflow_adapter)
+airflow_session.mount('http://', airflow_adapter)
+
+def airflow_request(method, airflow_uri, path, **kwargs):
+    response = airflow_session.request(
+        method, f"{airflow_uri}/api/v1{path}",
+        headers={'Authorization': f"Bearer {get_gcp_token()}"},
+        timeout=AIRFLOW_TIMEOUT,
+        **kwargs)
+    response.raise_for_status()
+    return response.json()
+
+def airflow_paged(method, airflow_uri, path, key, body=None):
+    """Yield items from a paginated Airflow collection"""
+    offset = 0
+    while True:
+        if method == 'GET':
+            page = airflow_request('GET', airflow_uri, path, params={'limit': AIRFLOW_PAGE_SIZE, 'offset': offset})
+        else:
+            page = airflow_request('POST', airflow_uri, path,
+                                   json=dict(body, page_offset=offset, page_limit=AIRFLOW_PAGE_SIZE))
+        items = page.get(key, [])
+        yield from items
+        offset += len(items)
+        if not items or offset >= page.get('total_entries', 0):
+            break
+
+def list_airflow_dags(airflow_uri):
+    return airflow_cache.get_or_load(
+        ('dags', airflow_uri),
+        lambda: [(dag['dag_id'], dag.get('is_paused', False))
+                 for dag in airflow_paged('GET', airflow_uri, '/dags', 'dags')])
+
+def fetch_dag_statuses(airflow_uri, dags):
+    """Latest run and its failed tasks for a batch of DAGs, using the batch list endpoints"""
+    since = (datetime.utcnow() - timedelta(hours=AIRFLOW_LOOKBACK_HOURS)).isoformat() + 'Z'
+    dag_ids = [dag_id for dag_id, _ in dags]
+
+    # Newest runs first, one page at a time. DAGs drop out of the query once their
+    # latest run is known, so frequently scheduled DAGs do not page through the window.
+    latest = {}
+    remaining = dag_ids
+    truncated = set()
+    for _ in range(AIRFLOW_MAX_RUN_PAGES):
+        page = airflow_request('POST', airflow_uri, '/dags/~/dagRuns/list', json={
+            'dag_ids': remaining,
+            'execution_date_gte': since,
+            'order_by': '-execution_date',
+            'page_offset': 0,
+            'page_limit': AIRFLOW_PAGE_SIZE,
+        })
+        runs = page.get('dag_runs', [])
+        for run in runs:
+            latest.setdefault(run['dag_id'], run)
+        remaining = [dag_id for dag_id in remaining if dag_id not in latest]
+        # A short page means the remaining DAGs have no runs in the window
+        if not remaining or len(runs) < AIRFLOW_PAGE_SIZE:
+            break
+    else:
+        # Out of pages: these DAGs may well have run, so report them as unknown
+        truncated = set(remaining)
+
+    failed = {}
+    failed_runs = [run['dag_run_id'] for run in latest.values() if run.get('state') == 'failed']
+    if failed_runs:
+        tasks = airflow_paged('POST', airflow_uri, '/dags/~/dagRuns/~/taskInstances/list', 'task_instances', {
+            'dag_ids': [dag_id for dag_id, run in latest.items() if run.get('state') == 'failed'],
+            'dag_run_ids': failed_runs,
+            'state': ['failed', 'upstream_failed'],
+        })
+        for task in tasks:
+            run = latest.get(task['dag_id'])
+            if run and task.get('dag_run_id', run['dag_run_id']) == run['dag_run_id']:
+                failed.setdefault(task['dag_id'], []).append(task['task_id'])
+
+    statuses = []
+    for dag_id, is_paused in dags:
+        if dag_id in truncated:
+            # Not cached, so the next request tries this DAG again
+            statuses.append(DagRunStatus(dag_id, is_paused, 'unknown'))
+            continue
+        run = latest.get(dag_id, {})
+        status = DagRunStatus(
+            dag_id, is_paused,
+            run.get('state'), run.get('dag_run_id'), run.get('execution_date'), run.get('end_date'),
+            tuple(failed.get(dag_id, ())))
+        airflow_cache.set(('status', airflow_uri, dag_id), status)
+        statuses.append(status)
+    return statuses
+
+def collect_dag_statuses(environments):
+    """DAG run status for every environment, querying uncached DAGs concurrently in batches"""
+    results = {env['name']: {'name': env['name'], 'dags': [], 'error': None} for env in environments}
+    dag_lists = {
+        env['name']: (env['airflow_uri'], airflow_executor.submit(list_airflow_dags, env['airflow_uri']))
+        for env in environments if env.get('airflow_uri')
+    }
+    batches = []
+    for name, (airflow_uri, future) in dag_lists.items():
+        try:
+            dags = future.result()
+        except Exception as e:
+            results[name]['error'] = str(e)
+            continue
+        cached = {}
+        missing = []
+        for dag_id, is_paused in dags:
+            status = airflow_cache.get(('status', airflow_uri, dag_id))
+            if status is None:
+                missing.append((dag_id, is_paused))
+            else:
+                cached[dag_id] = status
+        results[name]['dags'] = [cached.get(dag_id, dag_id) for dag_id, _ in dags]
+        for i in range(0, len(missing), AIRFLOW_BATCH_SIZE):
+            batch = missing[i:i + AIRFLOW_BATCH_SIZE]
+            batches.append((name, airflow_executor.submit(fetch_dag_statuses, airflow_uri, batch)))
+
+    fetched = {}
+    for name, future in batches:
+        try:
+            for status in future.result():
+                fetched[(name, status.dag_id)] = status
+        except Exception as e:
+            results[name]['error'] = str(e)
+    if fetched:
+        purge_after_request('airflow')
+
+    for name, env in results.items():
+        env['dags'] = [
+            entry if isinstance(entry, DagRunStatus) else fetched.get((name, entry), DagRunStatus(entry, False))
+            for entry in env['dags']
+        ]
+    return list(results.values())
 
 def list_composer_environments(project_id, location):
     try:
@@ -791,7 +2381,8 @@ def list_composer_environments(project_id, location):
                 "name": env.name.split('/')[-1],
                 "state": env.state.name,
                 "create_time": str(env.create_time),
-                "update_time": str(env.update_time)
+                "update_time": str(env.update_time),
+                "airflow_uri": env.config.airflow_uri
             })
         
         return env_list
@@ -873,14 +2464,16 @@ def environment_details(project_id, location, environment_name):
     try:
         details = get_composer_environment_details(project_id, location, environment_name)
         dags = list_dags(project_id, location, environment_name)
+        # Environment variables often hold credentials, so no shared cache may keep this page
         return render_template_string(COMPOSER_ENVIRONMENT_TEMPLATE, 
                                    details=details,
-                                   dags=dags)
+                                   dags=dags), 200, {'Cache-Control': 'private, no-store'}
     except Exception as e:
         return f"Error: {str(e)}", 500
 
 # Modified route handlers
 @app.route('/gcpstatus/composer')
+@cached_response()
 def index():
     project_id = os.getenv('GCP_PROJECT_ID', "tflabs")
     location = os.getenv('GCP_LOCATION', "us-central1")
@@ -897,6 +2490,260 @@ def index():
     except exceptions.GoogleAPICallError as error:
         return jsonify({"error": str(error)}), 500
 
+@app.route('/gcpstatus/composer/dags')
+@cached_response('airflow')
+def dag_run_status():
+    project_id = os.getenv('GCP_PROJECT_ID', "tflabs")
+    location = os.getenv('GCP_LOCATION', "us-central1")
+
+    try:
+        environments = list_composer_environments(project_id, location)
+        if isinstance(environments, dict):
+            return jsonify(environments), 500
+        return render_template_string(DAG_STATUS_TEMPLATE,
+                                   environments=collect_dag_statuses(environments),
+                                   lookback_hours=AIRFLOW_LOOKBACK_HOURS)
+    except Exception as e:
+        return f"Error: {str(e)}", 500
+
+# Inventory export
+
+EXPORT_TYPES = ['datasets', 'tables', 'schemas', 'topics', 'subscriptions', 'deployments', 'dags']
+
+# One flat schema shared by every resource type; columns that don't apply are null
+EXPORT_SCHEMA = pa.schema([
+    ('resource', pa.string()),
+    ('project', pa.string()),
+    ('parent', pa.string()),
+    ('name', pa.string()),
+    ('type', pa.string()),
+    ('created', pa.timestamp('us', tz='UTC')),
+    ('num_rows', pa.int64()),
+    ('num_bytes', pa.int64()),
+    ('field_type', pa.string()),
+    ('mode', pa.string()),
+    ('description', pa.string()),
+    ('topic', pa.string()),
+    ('push_endpoint', pa.string()),
+    ('retention_seconds', pa.int64()),
+    ('message_ordering', pa.bool_()),
+    ('exactly_once', pa.bool_()),
+    ('expiration_seconds', pa.int64()),
+    ('replicas', pa.int64()),
+    ('ready_replicas', pa.int64()),
+    ('images', pa.string()),
+    ('size', pa.int64()),
+    ('updated', pa.timestamp('us', tz='UTC')),
+])
+
+def bounded_map(fn, items, workers, window=None):
+    """Ordered concurrent map that keeps at most `window` calls in flight"""
+    window = window or workers * 2
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def export_bigquery(project, types):
+    client = bigquery.Client()
+    for dataset in client.list_datasets(project=project, page_size=EXPORT_PAGE_SIZE):
+        if 'datasets' in types:
+            yield {'resource': 'dataset', 'project': project, 'parent': project, 'name': dataset.dataset_id}
+        if 'tables' not in types and 'schemas' not in types:
+            continue
+        dataset_ref = client.dataset(dataset.dataset_id, project=dataset.project)
+        tables = client.list_tables(dataset_ref, page_size=EXPORT_PAGE_SIZE)
+        for table in bounded_map(client.get_table, tables, EXPORT_WORKERS):
+            if 'tables' in types:
+                yield {
+                    'resource': 'table', 'project': project, 'parent': dataset.dataset_id,
+                    'name': table.table_id, 'type': table.table_type, 'created': table.created,
+                    'num_rows': table.num_rows, 'num_bytes': table.num_bytes,
+                }
+            if 'schemas' in types:
+                for field in table.schema:
+                    yield {
+                        'resource': 'schema_field', 'project': project,
+                        'parent': f"{dataset.dataset_id}.{table.table_id}", 'name': field.name,
+                        'field_type': field.field_type, 'mode': field.mode, 'description': field.description,
+                    }
+
+def export_pubsub(project, types):
+    project_path = f"projects/{project}"
+    if 'topics' in types:
+        publisher = pubsub_v1.PublisherClient()
+        for topic in publisher.list_topics(request={"project": project_path, "page_size": EXPORT_PAGE_SIZE}):
+            yield {'resource': 'topic', 'project': project, 'parent': project, 'name': topic.name.split('/')[-1]}
+    if 'subscriptions' in types:
+        subscriber = pubsub_v1.SubscriberClient()
+        for sub in subscriber.list_subscriptions(request={"project": project_path, "page_size": EXPORT_PAGE_SIZE}):
+            record = SubscriptionRecord.from_proto(sub)
+            yield {
+                'resource': 'subscription', 'project': project, 'parent': project,
+                'name': record.name.split('/')[-1], 'topic': record.topic.split('/')[-1],
+                'push_endpoint': record.push_endpoint, 'retention_seconds': record.retention_seconds,
+                'message_ordering': record.message_ordering, 'exactly_once': record.exactly_once,
+                'expiration_seconds': record.expiration_seconds,
+            }
+
+def export_deployments(project, namespace):
+    config.load_kube_config()
+    apps_v1 = client.AppsV1Api()
+    page_token = None
+    while True:
+        kwargs = {'limit': EXPORT_PAGE_SIZE}
+        if page_token:
+            kwargs['_continue'] = page_token
+        if namespace:
+            page = apps_v1.list_namespaced_deployment(namespace, **kwargs)
+        else:
+            page = apps_v1.list_deployment_for_all_namespaces(**kwargs)
+        for deploy in page.items:
+            yield {
+                'resource': 'deployment', 'project': project, 'parent': deploy.metadata.namespace,
+                'name': deploy.metadata.name, 'created': deploy.metadata.creation_timestamp,
+                'replicas': deploy.spec.replicas,
+                'ready_replicas': (deploy.status.ready_replicas or 0) if deploy.status else 0,
+                'images': ','.join(c.image for c in deploy.spec.template.spec.containers),
+            }
+        page_token = page.metadata._continue if page.metadata else None
+        if not page_token:
+            break
+
+def export_dags(project, location):
+    composer = service_v1.EnvironmentsClient()
+    storage_client = storage.Client()
+    parent = f"projects/{project}/locations/{location}"
+    for env in composer.list_environments(request={"parent": parent, "page_size": EXPORT_PAGE_SIZE}):
+        dags_prefix = env.config.dag_gcs_prefix
+        if not dags_prefix:
+            continue
+        bucket = storage_client.bucket(dags_prefix.split('/')[2])
+        prefix = '/'.join(dags_prefix.split('/')[3:])
+        for blob in bucket.list_blobs(prefix=prefix, page_size=EXPORT_PAGE_SIZE):
+            if blob.name.endswith('.py'):
+                yield {
+                    'resource': 'dag', 'project': project, 'parent': env.name.split('/')[-1],
+                    'name': blob.name.split('/')[-1], 'size': blob.size, 'updated': blob.updated,
+                }
+
+def iter_inventory(project, types, namespace=None, location=None):
+    """Walk every upstream pager lazily, yielding one flat row at a time"""
+    if {'datasets', 'tables', 'schemas'} & types:
+        yield from export_bigquery(project, types)
+    if {'topics', 'subscriptions'} & types:
+        yield from export_pubsub(project, types)
+    if 'deployments' in types:
+        yield from export_deployments(project, namespace)
+    if 'dags' in types:
+        yield from export_dags(project, location)
+
+def ndjson_chunks(rows):
+    buffer = []
+    size = 0
+    for row in rows:
+        line = json.dumps(row, default=str) + '\n'
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+def csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_SCHEMA.names)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+class _ChunkSink:
+    """Write-only file object that collects bytes until they are drained"""
+
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def parquet_chunks(rows):
+    """Write one Parquet row group per EXPORT_ROW_GROUP rows and yield the bytes as they are produced"""
+    sink = _ChunkSink()
+    out = pa.PythonFile(sink, mode='w')
+    writer = pq.ParquetWriter(out, EXPORT_SCHEMA)
+    try:
+        group = []
+        for row in rows:
+            group.append(row)
+            if len(group) >= EXPORT_ROW_GROUP:
+                writer.write_batch(pa.RecordBatch.from_pylist(group, schema=EXPORT_SCHEMA))
+                group = []
+                yield sink.drain()
+        if group:
+            writer.write_batch(pa.RecordBatch.from_pylist(group, schema=EXPORT_SCHEMA))
+    finally:
+        writer.close()
+        out.close()
+    yield sink.drain()
+
+EXPORT_FORMATS = {
+    'ndjson': (ndjson_chunks, 'application/x-ndjson'),
+    'csv': (csv_chunks, 'text/csv'),
+    'parquet': (parquet_chunks, 'application/vnd.apache.parquet'),
+}
+
+@app.route('/gcpstatus/export')
+def export_inventory():
+    project = request.args.get('project', PROJECT_ID)
+    export_format = request.args.get('format', 'ndjson')
+    types = [t.strip() for t in request.args.get('types', ','.join(EXPORT_TYPES)).split(',') if t.strip()]
+    unknown = [t for t in types if t not in EXPORT_TYPES]
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    if unknown:
+        return jsonify({"error": f"unknown types: {', '.join(unknown)}"}), 400
+
+    rows = iter_inventory(project, set(types),
+                          namespace=request.args.get('namespace'),
+                          location=request.args.get('location', os.getenv('GCP_LOCATION', 'us-central1')))
+    encode, mimetype = EXPORT_FORMATS[export_format]
+
+    def generate():
+        try:
+            yield from encode(rows)
+        except Exception as e:
+            # Headers are already sent, so the error can only be logged
+            logger.error(f"Export of {project} failed: {e}")
+            raise
+
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={
+        'Content-Disposition': f"attachment; filename=inventory-{project}.{export_format}"
+    })
+
 # At the bottom of the file after all routes
 if __name__ == '__main__':
     print(f"Starting GCP Explorer on port 5000..")
@@ -0,0 +1,314 @@
+"""Hermetic benchmark for the GCP Explorer routes.
+
+Runs every route against the fake backends in fakes.py and reports per-route
+latency percentiles, throughput under concurrency, upstream call counts and
+memory. Reports are JSON so two runs (e.g. two commits) can be compared:
+
+    python benchmark.py --tables-per-dataset 10000 --latency-ms 2 -o base.json
+    python benchmark.py ... -o head.json
+    python benchmark.py --compare base.json head.json
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+import argparse
+import json
+import logging
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from google.cloud import bigquery
+
+import app
+from fakes import FakeConfig, FakeWorld
+
+
+def routes(world):
+    """Route name -> URL, built from the first items of the fake inventory."""
+    dataset_id = world.datasets[0]
+    table_id = world.tables[dataset_id][0]
+    namespace = world.namespace_names[0]
+    deployment = world.deployments[namespace][0].metadata.name
+    environment = world.environments[0].name.split('/')[-1]
+    project = world.cfg.project
+    return {
+        'list_datasets': '/gcpstatus/',
+        'list_tables': f"/gcpstatus/tables/{project}/{dataset_id}",
+        'show_schema': f"/gcpstatus/schema/{project}/{dataset_id}/{table_id}",
+        'preview_table': f"/gcpstatus/preview/{project}/{dataset_id}/{table_id}?limit=1000",
+        'preview_table_json': f"/gcpstatus/preview/{project}/{dataset_id}/{table_id}?limit=1000&columns=col_000,col_001&format=json",
+        'storage_summary': '/gcpstatus/storage',
+        'list_topics': '/gcpstatus/topics',
+        'show_topic': '/gcpstatus/topics/topic-0000',
+        'list_subscriptions': '/gcpstatus/subscriptions',
+        'list_deployments': f"/gcpstatus/gke/deployments?namespace={namespace}",
+        'show_pods': f"/gcpstatus/gke/pods/{deployment}?namespace={namespace}",
+        'tail_pod_log': f"/gcpstatus/gke/pods/{deployment}/logs/{deployment}-00000?namespace={namespace}&follow=0&tail=1000",
+        'tail_deployment_logs': f"/gcpstatus/gke/pods/{deployment}/logs?namespace={namespace}&follow=0&tail=1000",
+        'show_releases': f"/gcpstatus/gke/releases/{deployment}?namespace={namespace}",
+        'get_namespaces': '/gcpstatus/gke/namespaces',
+        'composer': '/gcpstatus/composer',
+        'dag_run_status': '/gcpstatus/composer/dags',
+        'export_ndjson': '/gcpstatus/export?format=ndjson',
+        'export_csv': '/gcpstatus/export?format=csv',
+        'export_parquet': '/gcpstatus/export?format=parquet',
+        'environment_details': f"/gcpstatus/environment/{project}/us-central1/{environment}",
+    }
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def fetch(test_client, url):
+    start = time.perf_counter()
+    response = test_client.get(url)
+    response.get_data()
+    elapsed = time.perf_counter() - start
+    if response.status_code >= 400:
+        raise RuntimeError(f"{url} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return elapsed, len(response.get_data())
+
+
+# Caches in app.py that would otherwise turn the counted request into a cache hit
+APP_CACHES = ['response_cache', 'storage_summary_cache', 'pubsub_cache', 'airflow_cache', 'tag_watch']
+
+
+def clear_app_caches():
+    for name in APP_CACHES:
+        getattr(app, name).invalidate()
+
+
+def bench_route(world, url, requests_per_route, concurrency):
+    test_client = app.app.test_client()
+
+    # Warm up clients and credentials, then time and count upstream calls for a
+    # single request with every app cache empty, and trace its allocations on a
+    # second cold request so tracemalloc does not slow the timed one
+    fetch(test_client, url)
+    clear_app_caches()
+    world.reset_calls()
+    cold, body_bytes = fetch(test_client, url)
+    calls = world.snapshot_calls()
+    clear_app_caches()
+    tracemalloc.start()
+    fetch(test_client, url)
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Sequential latency
+    latencies = [fetch(test_client, url)[0] for _ in range(requests_per_route)]
+
+    # Throughput under concurrency, one test client per request
+    def worker(_):
+        return fetch(app.app.test_client(), url)[0]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(requests_per_route)))
+    wall = time.perf_counter() - start
+
+    return {
+        'url': url,
+        'cold_ms': cold * 1000,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p90_ms': percentile(latencies, 90) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': max(latencies) * 1000,
+        'throughput_rps': requests_per_route / wall if wall else 0.0,
+        'upstream_calls': sum(calls.values()),
+        'upstream_calls_by_method': calls,
+        'peak_alloc_kb': peak_alloc / 1024,
+        'response_kb': body_bytes / 1024,
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(cfg, requests_per_route, concurrency, only=None, response_cache=False):
+    world = FakeWorld(cfg)
+    results = {}
+    ttl = app.RESPONSE_CACHE_TTL if response_cache else 0
+    with world.patch(app), mock.patch.object(app, 'RESPONSE_CACHE_TTL', ttl):
+        for name, url in routes(world).items():
+            if only and name not in only:
+                continue
+            results[name] = bench_route(world, url, requests_per_route, concurrency)
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'config': vars(cfg),
+            'requests_per_route': requests_per_route,
+            'concurrency': concurrency,
+            'response_cache': response_cache,
+            'peak_rss_mb': peak_rss_mb(),
+        },
+        'routes': results,
+    }
+
+
+def inventory_builders(world):
+    """Kind -> (legacy per-row dict builder, record builder), each taking a row index"""
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    fields = [bigquery.SchemaField.from_api_repr(f) for f in world._schema]
+    subscriptions = world.subscriptions
+
+    def subscription_proto(i):
+        # A fresh message per row, as each page from the API would be
+        return type(subscriptions[0])(subscriptions[i % len(subscriptions)])
+
+    def legacy_subscription(i):
+        sub = subscription_proto(i)
+        return {'name': sub.name, 'topic': sub.topic, 'push_config': sub.push_config,
+                'message_retention_duration': sub.message_retention_duration,
+                'enable_message_ordering': sub.enable_message_ordering,
+                'enable_exactly_once_delivery': sub.enable_exactly_once_delivery,
+                'expiration_policy': sub.expiration_policy}
+
+    return {
+        'datasets': (
+            lambda i: {'dataset_id': f"dataset_{i}", 'project': 'tflabs', 'full_dataset_id': f"tflabs.dataset_{i}"},
+            lambda i: app.DatasetRecord(f"dataset_{i}", 'tflabs'),
+        ),
+        'tables': (
+            lambda i: {'table_id': f"table_{i}", 'type': 'TABLE',
+                       'created': (created + timedelta(seconds=i)).strftime('%Y-%m-%d %H:%M:%S'),
+                       'num_rows': f"{i * 7919:,}", 'size_gb': f"{i * 7919 * 120 / 1024**3:.2f}"},
+            lambda i: app.TableRecord(f"table_{i}", 'TABLE', created + timedelta(seconds=i), i * 7919, i * 7919 * 120),
+        ),
+        'schema_fields': (
+            lambda i: bigquery.SchemaField.from_api_repr(dict(world._schema[i % len(fields)], name=f"col_{i}")),
+            lambda i: app.SchemaFieldRecord.from_field(
+                bigquery.SchemaField.from_api_repr(dict(world._schema[i % len(fields)], name=f"col_{i}"))),
+        ),
+        'subscriptions': (
+            legacy_subscription,
+            lambda i: app.SubscriptionRecord.from_proto(subscription_proto(i)),
+        ),
+        'pods': (
+            lambda i: {'name': f"pod-{i}", 'status': 'Running', 'ready': f"{i % 2}/1", 'restarts': i % 3,
+                       'cpu_usage': i * 0.001, 'memory_usage': i * 1024.0, 'age': created + timedelta(seconds=i)},
+            lambda i: app.PodRecord(f"pod-{i}", 'Running', i % 2, 1, i % 3, created + timedelta(seconds=i),
+                                    i * 0.001, i * 1024.0),
+        ),
+    }
+
+
+def retained_bytes(build, n):
+    tracemalloc.start()
+    rows = [build(i) for i in range(n)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return current
+
+
+def memory_report(n, world=None):
+    """Bytes retained by n inventory rows as legacy dicts vs record types"""
+    world = world or FakeWorld(FakeConfig(datasets=1, tables_per_dataset=1, deployments=1, environments=0))
+    report = {}
+    for kind, (legacy, record) in inventory_builders(world).items():
+        before = retained_bytes(legacy, n)
+        after = retained_bytes(record, n)
+        report[kind] = {
+            'records': n,
+            'legacy_mb': before / 1024**2,
+            'record_mb': after / 1024**2,
+            'change': (after - before) / before if before else 0.0,
+        }
+    return report
+
+
+COMPARE_METRICS = ['cold_ms', 'p50_ms', 'p99_ms', 'throughput_rps', 'upstream_calls', 'peak_alloc_kb']
+
+
+def compare(base, head):
+    """Render a per-route diff of two reports."""
+    lines = [f"{'route':<22}{'metric':<16}{'base':>12}{'head':>12}{'change':>10}"]
+    for name in sorted(set(base['routes']) | set(head['routes'])):
+        old = base['routes'].get(name)
+        new = head['routes'].get(name)
+        if old is None or new is None:
+            lines.append(f"{name:<22}{'only in ' + ('head' if old is None else 'base')}")
+            continue
+        for metric in COMPARE_METRICS:
+            a, b = old.get(metric, 0), new.get(metric, 0)
+            change = f"{(b - a) / a * 100:+.1f}%" if a else 'n/a'
+            lines.append(f"{name:<22}{metric:<16}{a:>12.1f}{b:>12.1f}{change:>10}")
+    rss = (base['meta'].get('peak_rss_mb', 0), head['meta'].get('peak_rss_mb', 0))
+    lines.append(f"{'process':<22}{'peak_rss_mb':<16}{rss[0]:>12.1f}{rss[1]:>12.1f}")
+    return '\n'.join(lines)
+
+
+def summary(report):
+    lines = [f"{'route':<22}{'cold ms':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'req/s':>10}"
+             f"{'calls':>8}{'alloc KB':>10}"]
+    for name, r in report['routes'].items():
+        lines.append(f"{name:<22}{r.get('cold_ms', 0):>10.1f}{r['p50_ms']:>10.1f}{r['p90_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+                     f"{r['throughput_rps']:>10.1f}{r['upstream_calls']:>8}{r['peak_alloc_kb']:>10.0f}")
+    lines.append(f"peak RSS: {report['meta']['peak_rss_mb']:.1f} MB")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    defaults = FakeConfig()
+    for field, value in vars(defaults).items():
+        if field == 'project':
+            continue
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(value), default=value)
+    parser.add_argument('--requests', type=int, default=20, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--route', action='append', help='only run these routes')
+    parser.add_argument('--response-cache', action='store_true',
+                        help='serve repeat requests from the page cache, so latencies measure cache hits')
+    parser.add_argument('-o', '--output', help='write the JSON report here')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'))
+    parser.add_argument('--memory', type=int, metavar='N',
+                        help='compare memory of N inventory rows as dicts vs record types, then exit')
+    args = parser.parse_args(argv)
+
+    if args.memory:
+        print(f"{'kind':<16}{'rows':>10}{'dicts MB':>12}{'records MB':>12}{'change':>10}")
+        for kind, r in memory_report(args.memory).items():
+            print(f"{kind:<16}{r['records']:>10}{r['legacy_mb']:>12.1f}{r['record_mb']:>12.1f}{r['change'] * 100:>+9.1f}%")
+        return
+
+    if args.compare:
+        with open(args.compare[0]) as f_base, open(args.compare[1]) as f_head:
+            print(compare(json.load(f_base), json.load(f_head)))
+        return
+
+    logging.getLogger().setLevel(logging.WARNING)
+    cfg = FakeConfig(**{field: getattr(args, field) for field in vars(defaults) if field != 'project'})
+    report = run(cfg, args.requests, args.concurrency, only=args.route,
+                 response_cache=args.response_cache)
+    print(summary(report))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Airflow DAG run status checks against the fake Airflow server in fakes.py."""
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+import app
+from fakes import FakeConfig, FakeWorld
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+def make_world(monkeypatch, **overrides):
+    monkeypatch.setattr(app, 'RESPONSE_CACHE_TTL', 0)
+    app.airflow_cache.invalidate()
+    cfg = dict(environments=2, dags_per_environment=60)
+    cfg.update(overrides)
+    return FakeWorld(FakeConfig(**cfg))
+
+
+def airflow_calls(world):
+    return {name: n for name, n in world.snapshot_calls().items() if name.startswith('airflow.')}
+
+
+def test_status_page_uses_batch_endpoints_and_cache(monkeypatch):
+    monkeypatch.setattr(app, 'AIRFLOW_BATCH_SIZE', 25)
+    world = make_world(monkeypatch)
+    with world.patch(app):
+        client = app.app.test_client()
+        response = client.get('/gcpstatus/composer/dags')
+        assert response.status_code == 200
+        # Per environment: one DAG list page, three batches of runs, failed tasks for each batch with a failure
+        assert airflow_calls(world) == {
+            'airflow.GET /dags': 2,
+            'airflow.POST /dags/~/dagRuns/list': 6,
+            'airflow.POST /dags/~/dagRuns/~/taskInstances/list': 6,
+        }
+        assert world.snapshot_calls()['auth.refresh'] == 1
+
+        world.reset_calls()
+        assert client.get('/gcpstatus/composer/dags').status_code == 200
+        assert airflow_calls(world) == {}
+        assert 'auth.refresh' not in world.snapshot_calls()
+
+
+def test_latest_run_and_failed_tasks(monkeypatch):
+    world = make_world(monkeypatch, environments=1, dags_per_environment=15)
+    with world.patch(app):
+        environments = app.list_composer_environments(world.cfg.project, 'us-central1')
+        [env] = app.collect_dag_statuses(environments)
+    statuses = {status.dag_id: status for status in env['dags']}
+
+    assert env['error'] is None
+    assert statuses['dag_0007'].state == 'failed'
+    assert statuses['dag_0007'].failed_tasks == ('task_1', 'task_2')
+    assert statuses['dag_0005'].state == 'running'
+    assert statuses['dag_0005'].end_date is None
+    assert statuses['dag_0001'].state == 'success'
+    assert statuses['dag_0001'].failed_tasks == ()
+    # Every seventh DAG is failed; all of them are DAGs whose latest run failed
+    assert [d for d, s in statuses.items() if s.failed_tasks] == ['dag_0000', 'dag_0007', 'dag_0014']
+
+
+def test_frequent_dags_do_not_page_through_the_window(monkeypatch):
+    monkeypatch.setattr(app, 'AIRFLOW_BATCH_SIZE', 50)
+    monkeypatch.setattr(app, 'AIRFLOW_PAGE_SIZE', 20)
+    world = make_world(monkeypatch, environments=1, dags_per_environment=50, dag_runs_per_dag=100)
+    with world.patch(app):
+        environments = app.list_composer_environments(world.cfg.project, 'us-central1')
+        [env] = app.collect_dag_statuses(environments)
+
+    # 5000 runs would be 250 pages; dropping DAGs once their latest run is known needs a handful
+    assert world.snapshot_calls()['airflow.POST /dags/~/dagRuns/list'] <= 4
+    assert all(status.state for status in env['dags'])
+
+
+def test_run_pages_are_capped(monkeypatch):
+    monkeypatch.setattr(app, 'AIRFLOW_BATCH_SIZE', 50)
+    monkeypatch.setattr(app, 'AIRFLOW_PAGE_SIZE', 1)
+    monkeypatch.setattr(app, 'AIRFLOW_MAX_RUN_PAGES', 3)
+    world = make_world(monkeypatch, environments=1, dags_per_environment=10)
+    with world.patch(app):
+        environments = app.list_composer_environments(world.cfg.project, 'us-central1')
+        [env] = app.collect_dag_statuses(environments)
+
+    assert world.snapshot_calls()['airflow.POST /dags/~/dagRuns/list'] == 3
+    # DAGs the capped pages did not reach are unknown, not "no runs", and are not cached
+    assert [status.state for status in env['dags']].count('unknown') == 7
+    airflow_uri = environments[0]['airflow_uri']
+    for status in env['dags']:
+        cached = app.airflow_cache.get(('status', airflow_uri, status.dag_id))
+        assert cached == (None if status.state == 'unknown' else status)
+
+
+def test_concurrency_is_capped_across_requests(monkeypatch):
+    monkeypatch.setattr(app, 'AIRFLOW_BATCH_SIZE', 5)
+    world = make_world(monkeypatch, environments=4, dags_per_environment=100, latency_ms=5)
+    with world.patch(app):
+        def load(_):
+            return app.app.test_client().get('/gcpstatus/composer/dags').status_code
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            assert list(pool.map(load, range(6))) == [200] * 6
+        assert 1 < world.airflow.max_in_flight <= app.AIRFLOW_MAX_CONCURRENCY
+
+
+def test_no_environments(monkeypatch):
+    world = make_world(monkeypatch, environments=0)
+    with world.patch(app):
+        assert app.collect_dag_statuses([]) == []
@@ -0,0 +1,98 @@
+"""Cache checks for TTLCache, ResponseCache and cached_response."""
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+
+import pytest
+
+import app
+from fakes import FakeConfig, FakeWorld
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+@pytest.fixture
+def world():
+    app.response_cache.invalidate()
+    world = FakeWorld(FakeConfig(namespaces=2, deployments=4))
+    with world.patch(app):
+        yield world
+    app.response_cache.invalidate()
+
+
+def test_concurrent_misses_share_one_load():
+    cache = app.TTLCache(60)
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return 'value'
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.get_or_load, 'key', loader) for _ in range(8)]
+        release.set()
+        assert [future.result() for future in futures] == ['value'] * 8
+    assert len(calls) == 1
+
+
+def test_failed_load_is_not_cached():
+    cache = app.TTLCache(60)
+
+    def failing():
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load('key', failing)
+    assert cache.get_or_load('key', lambda: 'value') == 'value'
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('/gcpstatus/storage', {'bigquery.query': len(app.BQ_REGIONS)}),
+    ('/gcpstatus/topics', {'pubsub.list_topics': 1, 'pubsub.list_subscriptions': 1}),
+])
+def test_concurrent_cold_requests_load_once(monkeypatch, url, expected):
+    monkeypatch.setattr(app, 'RESPONSE_CACHE_TTL', 0)
+    app.storage_summary_cache.invalidate()
+    app.pubsub_cache.invalidate()
+    world = FakeWorld(FakeConfig(latency_ms=50))
+    with world.patch(app):
+        def load(_):
+            return app.app.test_client().get(url).status_code
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            assert list(pool.map(load, range(8))) == [200] * 8
+        calls = world.snapshot_calls()
+    assert {name: calls.get(name, 0) for name in expected} == expected
+
+
+def test_response_cache_is_bounded_by_bytes():
+    cache = app.ResponseCache(60, maxsize=100, maxbytes=250)
+    for n in range(5):
+        cache.set(n, {'body': b'x' * 100, 'keys': set()})
+    assert [key for key in range(5) if cache.get(key) is not None] == [3, 4]
+
+
+def test_cache_key_ignores_args_the_route_does_not_read(world):
+    test_client = app.app.test_client()
+    assert test_client.get('/gcpstatus/gke/deployments?namespace=default').headers['X-Cache'] == 'MISS'
+    assert test_client.get('/gcpstatus/gke/deployments?namespace=default&x=1').headers['X-Cache'] == 'HIT'
+    assert test_client.get('/gcpstatus/gke/deployments?namespace=kube-system').headers['X-Cache'] == 'MISS'
+    assert len(app.response_cache._data) == 2
+
+
+def test_large_bodies_are_not_stored(world, monkeypatch):
+    monkeypatch.setattr(app, 'RESPONSE_CACHE_MAX_BODY', 100)
+    test_client = app.app.test_client()
+    for _ in range(2):
+        assert test_client.get('/gcpstatus/gke/deployments?namespace=default').headers['X-Cache'] == 'MISS'
+    assert len(app.response_cache._data) == 0
+
+
+def test_environment_details_is_never_cached(world):
+    environment = world.environments[0].name.split('/')[-1]
+    response = app.app.test_client().get(f"/gcpstatus/environment/{world.cfg.project}/us-central1/{environment}")
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'private, no-store'
+    assert 'X-Cache' not in response.headers
@@ -0,0 +1,227 @@
+"""Deployment and pod metrics checks against the fake backends in fakes.py."""
+import logging
+
+from kubernetes import client
+import pytest
+import requests
+import urllib3
+
+import app
+from fakes import FakeConfig, FakeCustomObjectsApi, FakeWorld
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+@pytest.fixture
+def world(monkeypatch):
+    monkeypatch.setattr(app, 'RESPONSE_CACHE_TTL', 0)
+    world = FakeWorld(FakeConfig(namespaces=2, deployments=20, pods_per_deployment=3))
+    with world.patch(app):
+        yield world
+
+
+def pod_metrics(name, labels, *usages):
+    return {
+        'metadata': {'name': name, 'labels': labels},
+        'containers': [{'name': f"c{i}", 'usage': {'cpu': cpu, 'memory': memory}}
+                       for i, (cpu, memory) in enumerate(usages)],
+    }
+
+
+def test_selector_index_first_match_wins():
+    lookup = app.build_selector_index([{'app': 'a'}, {'app': 'a', 'tier': 'web'}, {'app': 'b'}])
+    assert lookup({'app': 'a', 'tier': 'web'}) == 0
+    assert lookup({'app': 'b', 'pod-template-hash': 'x'}) == 2
+    assert lookup({'tier': 'web'}) == -1
+    assert lookup(None) == -1
+
+
+def test_selector_index_subset_selectors():
+    lookup = app.build_selector_index([{'app': 'a', 'tier': 'web'}, {'app': 'a'}, {}])
+    assert lookup({'app': 'a', 'tier': 'web'}) == 0
+    assert lookup({'app': 'a', 'tier': 'db'}) == 1
+    assert lookup({'app': 'a'}) == 1
+    # An empty selector never matches
+    assert lookup({'other': 'x'}) == -1
+
+
+def test_aggregate_pod_metrics_sums_containers_and_groups():
+    items = [
+        pod_metrics('a-1', {'app': 'a'}, ('250m', '64Mi'), ('500m', '64Mi')),
+        pod_metrics('a-2', {'app': 'a'}, ('1', '1Gi')),
+        pod_metrics('b-1', {'app': 'b'}, ('100m', '32Mi')),
+        pod_metrics('other', {'app': 'x'}, ('4', '4Gi')),
+    ]
+    groups = {'a': 0, 'b': 1}
+    per_pod, cpu, memory, pods = app.aggregate_pod_metrics(
+        items, lambda item: groups.get(item['metadata']['labels']['app'], -1))
+
+    assert per_pod == {
+        'a-1': (0.75, 128 * 1024**2),
+        'a-2': (1.0, 1024**3),
+        'b-1': (0.1, 32 * 1024**2),
+    }
+    assert cpu.tolist() == pytest.approx([1.75, 0.1])
+    assert memory.tolist() == [128 * 1024**2 + 1024**3, 32 * 1024**2]
+    assert pods.tolist() == [2, 1]
+
+
+def test_aggregate_pod_metrics_empty():
+    per_pod, cpu, memory, pods = app.aggregate_pod_metrics([], lambda item: 0)
+    assert per_pod == {}
+    assert len(cpu) == len(memory) == len(pods) == 0
+
+
+def test_deployments_page_makes_one_pod_and_one_metrics_call(world):
+    response = app.app.test_client().get('/gcpstatus/gke/deployments?namespace=default')
+    assert response.status_code == 200
+    assert world.snapshot_calls() == {
+        'k8s.list_namespaced_deployment': 1,
+        'k8s.list_namespaced_pod': 1,
+        'k8s.list_metrics.k8s.io.pods': 1,
+    }
+
+
+def test_pods_page_makes_one_pod_and_one_metrics_call(world):
+    response = app.app.test_client().get('/gcpstatus/gke/pods/deploy-0001?namespace=default')
+    assert response.status_code == 200
+    assert world.snapshot_calls() == {
+        'k8s.read_namespaced_deployment': 1,
+        'k8s.list_namespaced_pod': 1,
+        'k8s.list_metrics.k8s.io.pods': 1,
+    }
+
+
+def test_deployment_usage_matches_pod_metrics(world):
+    namespace = 'default'
+    expected = {}
+    items = FakeCustomObjectsApi(world).list_namespaced_custom_object('metrics.k8s.io', 'v1beta1', namespace, 'pods')
+    for item in items['items']:
+        deployment = item['metadata']['labels']['app']
+        cpu = sum(float(app.parse_quantity(c['usage']['cpu'])) for c in item['containers'])
+        expected[deployment] = expected.get(deployment, 0.0) + cpu
+
+    deploy_list = world.deployments[namespace]
+    lookup = app.build_selector_index([d.spec.selector.match_labels for d in deploy_list])
+    _, cpu, _, _ = app.aggregate_pod_metrics(items['items'], lambda item: lookup(item['metadata']['labels']))
+    for i, deploy in enumerate(deploy_list):
+        assert (cpu[i] if i < len(cpu) else 0.0) == pytest.approx(expected.get(deploy.metadata.name, 0.0))
+
+
+@pytest.mark.parametrize('error', [
+    urllib3.exceptions.MaxRetryError(None, '/apis/metrics.k8s.io/v1beta1'),
+    urllib3.exceptions.ReadTimeoutError(None, '/apis/metrics.k8s.io/v1beta1', 'read timed out'),
+    ConnectionRefusedError(),
+])
+def test_metrics_connection_errors_fall_back_to_na(world, monkeypatch, error):
+    def unreachable(self, *args, **kwargs):
+        raise error
+    monkeypatch.setattr(FakeCustomObjectsApi, 'list_namespaced_custom_object', unreachable)
+
+    test_client = app.app.test_client()
+    deployments = test_client.get('/gcpstatus/gke/deployments?namespace=default')
+    pods = test_client.get('/gcpstatus/gke/pods/deploy-0001?namespace=default')
+    assert deployments.status_code == 200 and b'n/a' in deployments.data
+    assert pods.status_code == 200 and b'n/a' in pods.data
+
+
+def test_metrics_unavailable_falls_back_to_na(monkeypatch):
+    monkeypatch.setattr(app, 'RESPONSE_CACHE_TTL', 0)
+    world = FakeWorld(FakeConfig(namespaces=2, deployments=4, metrics_available=False))
+    with world.patch(app):
+        response = app.app.test_client().get('/gcpstatus/gke/deployments?namespace=default')
+    assert response.status_code == 200
+    assert b'n/a' in response.data
+
+
+def test_rollout_history_digests_come_from_each_revisions_pods():
+    def replica_set(revision, template_hash):
+        return client.V1ReplicaSet(
+            metadata=client.V1ObjectMeta(
+                name=f"web-{template_hash}", labels={'app': 'web', 'pod-template-hash': template_hash},
+                annotations={'deployment.kubernetes.io/revision': str(revision)},
+                owner_references=[client.V1OwnerReference(api_version='apps/v1', kind='Deployment',
+                                                          name='web', uid='uid-web')]),
+            spec=client.V1ReplicaSetSpec(
+                selector=client.V1LabelSelector(match_labels={'app': 'web'}),
+                template=client.V1PodTemplateSpec(spec=client.V1PodSpec(
+                    containers=[client.V1Container(name='app', image='gcr.io/p/web:latest')]))))
+
+    def pod(name, template_hash, digest):
+        return client.V1Pod(
+            metadata=client.V1ObjectMeta(name=name, labels={'app': 'web', 'pod-template-hash': template_hash}),
+            spec=client.V1PodSpec(containers=[client.V1Container(name='app', image='gcr.io/p/web:latest')]),
+            status=client.V1PodStatus(container_statuses=[client.V1ContainerStatus(
+                name='app', image='gcr.io/p/web:latest', image_id=f"docker-pullable://gcr.io/p/web@sha256:{digest}",
+                ready=True, restart_count=0)]))
+
+    deploy = client.V1Deployment(metadata=client.V1ObjectMeta(name='web', uid='uid-web'))
+    replica_sets = [replica_set(1, 'aaa'), replica_set(3, 'ccc'), replica_set(2, 'bbb')]
+    pods = [pod('web-1', 'ccc', 'new'), pod('web-2', 'ccc', 'new'), pod('web-3', 'bbb', 'old')]
+
+    history = app.rollout_history(deploy, replica_sets, pods)
+    assert [(rs.revision, rs.images[0][2]) for rs in history] == [
+        (3, ['gcr.io/p/web@sha256:new']),
+        (2, ['gcr.io/p/web@sha256:old']),
+        (1, []),
+    ]
+
+
+def test_tag_watch_follows_the_newest_pod_and_purges_after_the_request(monkeypatch):
+    monkeypatch.setattr(app, 'tag_watch', app.TTLCache(60))
+    purged = []
+    monkeypatch.setattr(app.response_cache, 'purge', lambda *keys, keep=None: purged.append(keys))
+
+    def pod(minute, digest):
+        return client.V1Pod(
+            metadata=client.V1ObjectMeta(name=f"web-{minute}", namespace='default',
+                                         creation_timestamp=app.datetime(2024, 1, 1, 0, minute)),
+            spec=client.V1PodSpec(containers=[client.V1Container(name='app', image='gcr.io/p/web:latest')]),
+            status=client.V1PodStatus(container_statuses=[client.V1ContainerStatus(
+                name='app', image='gcr.io/p/web:latest', image_id=f"gcr.io/p/web@sha256:{digest}",
+                ready=True, restart_count=0)]))
+
+    with app.app.test_request_context():
+        # A stale replica next to newer ones, or a listing of only the stale one, changes nothing
+        app.purge_on_tag_move('default', [pod(1, 'old'), pod(2, 'new'), pod(3, 'new')])
+        app.purge_on_tag_move('default', [pod(1, 'old')])
+        app.purge_on_tag_move('other', [pod(1, 'old')])
+        assert app.tag_watch.get(('default', 'gcr.io/p/web:latest'))[1] == 'gcr.io/p/web@sha256:new'
+
+        app.purge_on_tag_move('default', [pod(3, 'new'), pod(4, 'newer')])
+        assert purged == []
+    assert purged == [('namespace/default',)]
+
+
+def test_purges_reach_the_cdn_when_configured(monkeypatch):
+    posted = []
+
+    def post(url, **kwargs):
+        posted.append((url, kwargs))
+        response = requests.Response()
+        response.status_code = 200
+        return response
+    monkeypatch.setattr(app, 'CDN_PURGE_URL', 'https://cdn.example/purge')
+    monkeypatch.setattr(app.requests, 'post', post)
+
+    app.purge_after_request('namespace/default', 'airflow')
+    app.cdn_purge_executor.submit(lambda: None).result()
+
+    [(url, kwargs)] = posted
+    assert url == 'https://cdn.example/purge'
+    assert kwargs['headers'][app.SURROGATE_KEY_HEADER] == 'airflow namespace/default'
+    assert kwargs['json'] == {'surrogate_keys': ['airflow', 'namespace/default']}
+
+
+def test_unset_requests_render_as_dash_without_warning(world):
+    deploy = next(d for d in world.deployments['default'] if d.metadata.name == 'deploy-0001')
+    for container in deploy.spec.template.spec.containers:
+        container.resources = client.V1ResourceRequirements(limits={'cpu': '500m', 'memory': '256Mi'})
+
+    test_client = app.app.test_client()
+    pods = test_client.get('/gcpstatus/gke/pods/deploy-0001?namespace=default').get_data(as_text=True)
+    assert 'bg-warning' not in pods
+    assert '</span> / -</td>' in pods
+    deployments = test_client.get('/gcpstatus/gke/deployments?namespace=default').get_data(as_text=True)
+    row = deployments[deployments.index('deploy-0001'):].split('</tr>', 1)[0]
+    assert ' / - / 1500</td>' in row and ' / - / 768</td>' in row
@@ -0,0 +1,63 @@
+"""Log tail checks against the fake backends in fakes.py."""
+import logging
+import threading
+import time
+
+import pytest
+
+import app
+from fakes import FakeConfig, FakeWorld
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+@pytest.fixture
+def quiet_world(monkeypatch):
+    """Pods that log a few lines and then stay silent"""
+    monkeypatch.setattr(app, 'LOG_IDLE_SECONDS', 1)
+    monkeypatch.setattr(app, 'LOG_MAX_SECONDS', 2)
+    world = FakeWorld(FakeConfig(namespaces=1, deployments=1, pods_per_deployment=3,
+                                 log_lines=5, log_interval_ms=60000))
+    with world.patch(app):
+        yield world
+
+
+def test_quiet_pod_stops_at_deadline(quiet_world):
+    start = time.monotonic()
+    response = app.app.test_client().get('/gcpstatus/gke/pods/deploy-0000/logs/deploy-0000-00000?namespace=kube-system')
+    body = response.get_data()
+    elapsed = time.monotonic() - start
+
+    assert body.endswith(b'[log stream stopped: time limit reached]\n')
+    assert body.count(b'INFO request') == 5
+    assert elapsed < app.LOG_MAX_SECONDS + app.LOG_IDLE_SECONDS + 1
+    # Each idle timeout reopens the stream instead of blocking forever
+    assert quiet_world.snapshot_calls()['k8s.read_namespaced_pod_log'] >= 2
+
+
+def test_readers_exit_after_client_disconnects(quiet_world):
+    before = threading.active_count()
+    response = app.app.test_client().get('/gcpstatus/gke/pods/deploy-0000/logs?namespace=kube-system', buffered=False)
+    assert next(iter(response.response)).startswith(b'[tailing 3 pods')
+    response.close()
+
+    deadline = time.monotonic() + app.LOG_IDLE_SECONDS + 1
+    while threading.active_count() > before and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert threading.active_count() <= before
+
+
+@pytest.mark.parametrize('url', [
+    '/gcpstatus/gke/pods/deploy-0000/logs?namespace=kube-system',
+    '/gcpstatus/gke/pods/deploy-0000/logs/deploy-0000-00000?namespace=kube-system',
+])
+def test_head_request_starts_no_readers(quiet_world, url):
+    before = threading.active_count()
+    response = app.app.test_client().head(url)
+    assert response.status_code == 200
+    response.close()
+
+    time.sleep(app.LOG_IDLE_SECONDS + 0.5)
+    assert threading.active_count() <= before
+    # Only the single-pod route opens its stream up front, and nothing reopens it
+    assert quiet_world.snapshot_calls().get('k8s.read_namespaced_pod_log', 0) <= 1